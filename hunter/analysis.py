@@ -1,18 +1,21 @@
-from dataclasses import dataclass
-from typing import Iterable, List, Reversible
+import logging
+import math
+import os
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from heapq import heapify, heappop, heappush
+from itertools import count, permutations, product
+from typing import Iterable, List, Optional, Sequence, Union
 
 import numpy as np
-from scipy.stats import ttest_ind_from_stats
+from scipy.special import stdtr
 from signal_processing_algorithms.e_divisive import EDivisive
 from signal_processing_algorithms.e_divisive.base import SignificanceTester
 from signal_processing_algorithms.e_divisive.calculators import cext_calculator
 from signal_processing_algorithms.e_divisive.change_points import EDivisiveChangePoint
-from signal_processing_algorithms.e_divisive.significance_test import (
-    QHatPermutationsSignificanceTester,
-)
 
 
-@dataclass
+@dataclass(frozen=True)
 class ComparativeStats:
     """
     Keeps statistics of two series of data and the probability both series
@@ -24,6 +27,18 @@ class ComparativeStats:
     std_1: float
     std_2: float
     pvalue: float
+    # Computed once on construction, because merge() reads it many times
+    magnitude: float = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # Stats of empty or zero-mean data yield NaN or infinite magnitude,
+        # no need to warn about it here, before anybody asks for the magnitude.
+        # The means are converted to NumPy floats, because dividing plain floats by zero raises.
+        mean_1 = np.float64(self.mean_1)
+        mean_2 = np.float64(self.mean_2)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            magnitude = max(abs(mean_2 / mean_1 - 1.0), abs(mean_1 / mean_2 - 1.0))
+        object.__setattr__(self, "magnitude", magnitude)
 
     def forward_rel_change(self):
         """Relative change from left to right"""
@@ -41,7 +56,7 @@ class ComparativeStats:
 
     def change_magnitude(self):
         """Maximum of absolutes of rel_change and rel_change_reversed"""
-        return max(abs(self.forward_rel_change()), abs(self.backward_rel_change()))
+        return self.magnitude
 
     def mean_before(self):
         return self.mean_1
@@ -69,10 +84,159 @@ class ComparativeStats:
 
 @dataclass
 class ChangePoint:
+    # Slots save memory, because there may be many change points per metric
+    __slots__ = ("index", "stats")
     index: int
     stats: ComparativeStats
 
 
+class NumpyCalculator:
+    """
+    Computes E-Divisive q-hat values with vectorized NumPy operations.
+    Used as a portable fallback when the native calculator
+    shipped with signal_processing_algorithms cannot be loaded.
+    Produces the same values as the native calculator and as `numpy_calculator`
+    of signal_processing_algorithms, which would be the natural fallback, but it
+    loops over the split points in Python and is about 12x slower on 50-point windows.
+    """
+
+    @staticmethod
+    def calculate_diffs(series: np.ndarray) -> np.ndarray:
+        series = np.asarray(series, dtype=np.float64)
+        return np.abs(series[:, None] - series[None, :])
+
+    @staticmethod
+    def calculate_qhat_values(diffs: np.ndarray) -> np.ndarray:
+        # We partition the signal into X = {Xi; 0 <= i < tau} and Y = {Yj; tau <= j < n}.
+        # Moving tau by one moves the sum of differences of X[tau] to all earlier points
+        # (column_delta) from the cross term to the X term, and the sum of differences
+        # of Y[tau] to all later points (row_delta) from the Y term to the cross term.
+        n = len(diffs)
+        upper = np.triu(diffs, 1)
+        column_delta = np.concatenate(([0.0], np.cumsum(upper.sum(axis=0))[:-1]))
+        row_delta = np.concatenate(([0.0], np.cumsum(upper.sum(axis=1))[:-1]))
+        x_term = column_delta
+        y_term = upper.sum() - row_delta
+        cross_term = row_delta - column_delta
+
+        x_len = np.arange(n, dtype=np.float64)
+        y_len = n - x_len
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cross_term_reg = np.where(
+                (x_len < 1) | (y_len < 1), 0.0, cross_term * 2.0 / (x_len * y_len)
+            )
+            x_term_reg = np.where(x_len < 2, 0.0, x_term * 2.0 / (x_len * (x_len - 1)))
+            y_term_reg = np.where(y_len < 2, 0.0, y_term * 2.0 / (y_len * (y_len - 1)))
+        return x_len * y_len / n * (cross_term_reg - x_term_reg - y_term_reg)
+
+
+def load_calculator(name: Optional[str] = None):
+    """
+    Returns the E-Divisive q-hat calculator with the given name: "cext", "numba" or "numpy".
+    If the name is not given or the requested calculator is not available, picks the native
+    calculator if it loads, then the Numba one if Numba is installed, then the NumPy one.
+    """
+    # The native calculator module defines its functions only if the native library loads
+    native_available = hasattr(cext_calculator, "calculate_qhat_values")
+    if name == "cext" and native_available:
+        return cext_calculator
+    if name == "numpy":
+        return NumpyCalculator
+    if name == "numba" or not native_available:
+        # Imported only when needed, because importing Numba takes a while
+        from hunter.numba_calculator import NUMBA_AVAILABLE, NumbaCalculator
+
+        if NUMBA_AVAILABLE:
+            return NumbaCalculator
+    if name is not None:
+        logging.warning(f"Calculator {name} is not available, using the default one")
+    return cext_calculator if native_available else NumpyCalculator
+
+
+DEFAULT_CALCULATOR = load_calculator(os.environ.get("HUNTER_CALCULATOR"))
+
+
+def mean_and_std(values: np.ndarray) -> (float, float):
+    """
+    Computes the mean and the population standard deviation of the values.
+    Cheaper than calling np.mean and np.std separately, because np.std would compute
+    the mean again. The deviations are squared after subtracting the mean,
+    which avoids the catastrophic cancellation of the naive sum-of-squares formula.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    mean = np.add.reduce(values) / n
+    deviations = values - mean
+    return mean, math.sqrt(np.dot(deviations, deviations) / n)
+
+
+def ttest_pvalue(mean_l, std_l, n_l, mean_r, std_r, n_r):
+    """
+    Computes the two-sided P-value of the Student's t-test with pooled variance
+    from the means, standard deviations and sizes of two samples.
+    Gives the same results as `scipy.stats.ttest_ind_from_stats`, but calls
+    the t distribution directly, skipping the argument handling of the wrapper.
+    Accepts scalars as well as NumPy arrays of statistics.
+    """
+    df = n_l + n_r - 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pooled_var = ((n_l - 1) * std_l * std_l + (n_r - 1) * std_r * std_r) / df
+        t = (mean_l - mean_r) / np.sqrt(pooled_var * (1.0 / n_l + 1.0 / n_r))
+        return 2.0 * stdtr(df, -np.abs(t))
+
+
+class PrefixSums:
+    """
+    Keeps cumulative sums of values of a series, so the mean of any slice
+    of the series can be computed in O(1), without scanning the slice.
+
+    The standard deviations are computed from the deviations of the slice itself.
+    Deriving them from cumulative sums of squares would be O(1) as well,
+    but once the sums get large, subtracting them cancels catastrophically
+    and yields wrong deviations, e.g. for series with large level offsets.
+    Stats of many adjacent slices are computed at once by `segments_means_and_stds`.
+    """
+
+    __series: np.ndarray
+    __shift: float
+    __sums: np.ndarray
+
+    def __init__(self, series: np.ndarray):
+        self.__series = np.asarray(series, dtype=np.float64)
+        # Shifting the values towards zero keeps the sums small,
+        # which limits the rounding error of the means
+        self.__shift = float(np.mean(self.__series)) if len(self.__series) > 0 else 0.0
+        self.__sums = np.concatenate(([0.0], np.cumsum(self.__series - self.__shift)))
+
+    def __std(self, start: int, end: int) -> float:
+        if end - start < 2:
+            return 0.0
+        return mean_and_std(self.__series[start:end])[1]
+
+    def mean_and_std(self, start: int, end: int) -> (float, float):
+        """Returns the mean and the population standard deviation of series[start:end]"""
+        mean = (self.__sums[end] - self.__sums[start]) / (end - start)
+        return mean + self.__shift, self.__std(start, end)
+
+    def segments_means_and_stds(self, endpoints: np.ndarray) -> (np.ndarray, np.ndarray):
+        """
+        Returns the means and the population standard deviations of all the segments
+        series[endpoints[k]:endpoints[k + 1]] at once. The endpoints must be strictly increasing.
+        The segments don't overlap, so this scans each value once, and the deviations
+        of each segment are taken from its own mean, in a few vectorized operations.
+        """
+        starts = endpoints[:-1] - endpoints[0]
+        lengths = np.diff(endpoints)
+        values = self.__series[endpoints[0] : endpoints[-1]]
+        means = np.add.reduceat(values, starts) / lengths
+        deviations = values - np.repeat(means, lengths)
+        variances = np.add.reduceat(deviations * deviations, starts) / lengths
+        return means, np.sqrt(variances)
+
+    def __len__(self):
+        return len(self.__sums) - 1
+
+
 class ExtendedSignificanceTester(SignificanceTester):
     """
     Adds capability of exposing the means and deviations of both sides of the split
@@ -96,9 +260,15 @@ class ExtendedSignificanceTester(SignificanceTester):
         ...
 
     @staticmethod
-    def find_window(candidate: int, window_endpoints: Reversible[int]) -> (int, int):
-        start: int = next((x for x in reversed(window_endpoints) if x < candidate), None)
-        end: int = next((x for x in window_endpoints if x > candidate), None)
+    def find_window(candidate: int, window_endpoints: Sequence[int]) -> (int, int):
+        """
+        Returns the nearest window endpoints strictly before and strictly after the candidate.
+        The endpoints must be sorted.
+        """
+        i = bisect_left(window_endpoints, candidate)
+        start: int = window_endpoints[i - 1] if i > 0 else None
+        j = bisect_right(window_endpoints, candidate, i)
+        end: int = window_endpoints[j] if j < len(window_endpoints) else None
         return start, end
 
     def is_significant(
@@ -123,7 +293,7 @@ class TTestSignificanceTester(ExtendedSignificanceTester):
         self.pvalue = pvalue
 
     def change_point(
-        self, index: int, series: np.ndarray, window_endpoints: Reversible[int]
+        self, index: int, series: np.ndarray, window_endpoints: Sequence[int]
     ) -> ChangePoint:
 
         (start, end) = self.find_window(index, window_endpoints)
@@ -136,36 +306,200 @@ class TTestSignificanceTester(ExtendedSignificanceTester):
         if len(left) == 0 or len(right) == 0:
             raise ValueError
 
-        mean_l = np.mean(left)
-        mean_r = np.mean(right)
-        std_l = np.std(left) if len(left) >= 2 else 0.0
-        std_r = np.std(right) if len(right) >= 2 else 0.0
+        mean_l, std_l = mean_and_std(left)
+        mean_r, std_r = mean_and_std(right)
+        return self.compare_stats(mean_l, std_l, len(left), mean_r, std_r, len(right))
 
-        if len(left) + len(right) > 2:
-            (_, p) = ttest_ind_from_stats(
-                mean_l, std_l, len(left), mean_r, std_r, len(right), alternative="two-sided"
+    def change_point_from_sums(
+        self, index: int, sums: PrefixSums, window_endpoints: Sequence[int]
+    ) -> ChangePoint:
+        """
+        Same as `change_point`, but reads the means of both sides of the split
+        from precomputed prefix sums. The standard deviations still scan both sides.
+        """
+        (start, end) = self.find_window(index, window_endpoints)
+        if start >= index or index >= end:
+            raise ValueError
+        mean_l, std_l = sums.mean_and_std(start, index)
+        mean_r, std_r = sums.mean_and_std(index, end)
+        stats = self.compare_stats(mean_l, std_l, index - start, mean_r, std_r, end - index)
+        return ChangePoint(index, stats)
+
+    def change_points_from_sums(
+        self, indexes: Sequence[int], sums: PrefixSums
+    ) -> List[ChangePoint]:
+        """
+        Computes the change points at all given indexes at once.
+        The window of each change point is bounded by the neighboring indexes
+        or by the ends of the series. The indexes must be sorted.
+        Gives the same results as calling `change_point` for each index,
+        but computes the stats and the P-values in a few vectorized operations.
+        """
+        if len(indexes) == 0:
+            return []
+        indexes = np.asarray(indexes)
+        # The windows of the change points are the segments between the distinct endpoints:
+        # each change point ends one segment and starts the next one
+        endpoints = np.unique(np.concatenate(([0], indexes, [len(sums)])))
+        means, stds = sums.segments_means_and_stds(endpoints)
+        right = np.searchsorted(endpoints, indexes)
+        left = right - 1
+        means_l, stds_l = means[left], stds[left]
+        means_r, stds_r = means[right], stds[right]
+        n_l = indexes - endpoints[left]
+        n_r = endpoints[right + 1] - indexes
+        pvalues = ttest_pvalue(means_l, stds_l, n_l, means_r, stds_r, n_r)
+        pvalues = np.where(n_l + n_r > 2, pvalues, 1.0)
+        return [
+            ChangePoint(index, ComparativeStats(mean_l, mean_r, std_l, std_r, pvalue))
+            for (index, mean_l, mean_r, std_l, std_r, pvalue) in zip(
+                indexes.tolist(),
+                means_l,
+                means_r,
+                stds_l,
+                stds_r,
+                pvalues,
             )
+        ]
+
+    @staticmethod
+    def compare_stats(
+        mean_l: float, std_l: float, n_l: int, mean_r: float, std_r: float, n_r: int
+    ) -> ComparativeStats:
+        if n_l + n_r > 2:
+            p = ttest_pvalue(mean_l, std_l, n_l, mean_r, std_r, n_r)
         else:
             p = 1.0
         return ComparativeStats(mean_l, mean_r, std_l, std_r, p)
 
 
-def fill_missing(data: List[float]):
+class PermutationsSignificanceTester(ExtendedSignificanceTester):
+    """
+    Decides if a candidate change point is significant by comparing its q-hat value
+    with the best q-hat values found in randomly permuted windows of the series.
+    The P-value is the fraction of the permutations that reach the q-hat of the candidate.
+
+    This is the same test as `QHatPermutationsSignificanceTester`, but it stops permuting
+    as soon as enough permutations reached the q-hat of the candidate that
+    the candidate can't be significant anymore, whatever the remaining permutations give.
+    Most candidates are clearly insignificant, so they are rejected after a few permutations.
+    The statistics of the returned change points are computed with the t-test.
+    """
+
+    def __init__(self, calculator, pvalue: float, permutations: int, seed: Optional[int] = None):
+        self.pvalue = pvalue
+        self.__calculator = calculator
+        self.__permutations = permutations
+        self.__rng = np.random.default_rng(seed)
+        self.__ttest = TTestSignificanceTester(pvalue)
+
+    def change_point(self, index: int, series: np.ndarray, windows: Iterable[int]) -> ChangePoint:
+        return self.__ttest.change_point(index, series, windows)
+
+    def compare(self, left: np.ndarray, right: np.ndarray) -> ComparativeStats:
+        return self.__ttest.compare(left, right)
+
+    def is_significant(
+        self, candidate: EDivisiveChangePoint, series: np.ndarray, windows: Iterable[int]
+    ) -> bool:
+        windows = list(windows)
+        # Copy the windows once, into a single buffer; each window is a view of it.
+        # Every trial permutes these views in place, so no arrays are allocated per trial,
+        # and shuffling an already shuffled window is still a uniformly random permutation.
+        buffer = np.array(series[windows[0] : windows[-1]], dtype=np.float64)
+        window_values = np.split(buffer, [w - windows[0] for w in windows[1:-1]])
+        orderings = self.__count_orderings(window_values)
+        if orderings <= self.__permutations:
+            # Tiny series have fewer distinct orderings than the permutations we'd draw,
+            # so testing each of them once is both cheaper and exact
+            trials = self.__all_orderings(window_values)
+            trial_count = orderings
+        else:
+            trials = self.__random_orderings(window_values)
+            trial_count = self.__permutations + 1
+
+        # The candidate is significant if at most that many trials reach its q-hat
+        max_exceedances = math.floor(self.pvalue * trial_count)
+        exceedances = 0
+        for permuted_windows in trials:
+            if self.__reaches(permuted_windows, candidate.qhat):
+                exceedances += 1
+                if exceedances > max_exceedances:
+                    break
+        # If the loop stopped early, this is a lower bound of the P-value, still above the limit
+        candidate.probability = exceedances / trial_count
+        return exceedances <= max_exceedances
+
+    def __count_orderings(self, window_values: List[np.ndarray]) -> int:
+        """
+        Counts the orderings of the windows, i.e. the product of the factorials
+        of their lengths. Stops as soon as the count exceeds permutations,
+        so large windows don't build huge factorials just to compare them.
+        """
+        orderings = 1
+        for window in window_values:
+            for factor in range(2, len(window) + 1):
+                orderings *= factor
+                if orderings > self.__permutations:
+                    return orderings
+        return orderings
+
+    @staticmethod
+    def __all_orderings(window_values: List[np.ndarray]) -> Iterable[List[np.ndarray]]:
+        # Both permutations and product copy their input up front,
+        # so the windows can be overwritten with each ordering
+        for ordering in product(*(permutations(window) for window in window_values)):
+            for (window, values) in zip(window_values, ordering):
+                window[:] = values
+            yield window_values
+
+    def __random_orderings(self, window_values: List[np.ndarray]) -> Iterable[List[np.ndarray]]:
+        for _ in range(self.__permutations):
+            for window in window_values:
+                self.__rng.shuffle(window)
+            yield window_values
+
+    def __reaches(self, window_values: List[np.ndarray], qhat: float) -> bool:
+        """
+        Tells if any of the windows reaches the given q-hat.
+        The remaining windows don't need to be computed once one of them does.
+        """
+        for window in window_values:
+            diffs = self.__calculator.calculate_diffs(window)
+            if np.max(self.__calculator.calculate_qhat_values(diffs)) >= qhat:
+                return True
+        return False
+
+
+def fill_missing(data: Union[List[float], np.ndarray]) -> np.ndarray:
     """
     Forward-fills None occurrences with nearest previous non-None values.
     Initial None values are back-filled with the nearest future non-None value.
+    NaN values are treated as missing as well.
+    Accepts either a list or a float NumPy array, which is updated in place.
+    Returns the filled values as a float64 array, ready to be passed to the analysis
+    without another conversion. If `data` is a float64 array, it is returned itself.
     """
-    prev = None
-    for i in range(len(data)):
-        if data[i] is None and prev is not None:
-            data[i] = prev
-        prev = data[i]
-
-    prev = None
-    for i in reversed(range(len(data))):
-        if data[i] is None and prev is not None:
-            data[i] = prev
-        prev = data[i]
+    values = np.asarray(data, dtype=np.float64)
+    missing = np.isnan(values)
+    if not missing.any() or missing.all():
+        return values
+
+    # Forward-fill: each position takes the value at the index
+    # of the last non-missing value seen so far
+    n = len(values)
+    index = np.where(missing, 0, np.arange(n))
+    np.maximum.accumulate(index, out=index)
+    filled = values[index]
+
+    # Back-fill the initial missing values with the first non-missing value
+    first = np.argmax(~missing)
+    filled[:first] = filled[first]
+    if values is data:
+        data[:] = filled
+        return data
+    data[:] = filled if isinstance(data, np.ndarray) else filled.tolist()
+    return filled
 
 
 def merge(
@@ -182,39 +516,87 @@ def merge(
     """
 
     tester = TTestSignificanceTester(max_pvalue)
-    while change_points:
+    sums = PrefixSums(series)
+
+    # Change points by their index in the series, linked to the neighboring
+    # change points (or to the ends of the series), so that removing a point
+    # and finding its neighbors doesn't need to search or shift a list:
+    alive = {cp.index: cp for cp in change_points}
+    indexes = sorted(alive)
+    prev_index = dict(zip(indexes, [0] + indexes[:-1]))
+    next_index = dict(zip(indexes, indexes[1:] + [len(series)]))
+
+    # Change points ordered by descending P-value and by ascending relative change.
+    # Ties are resolved by the position in the series.
+    # Removed or recomputed change points are not deleted from the heaps eagerly;
+    # their stale entries are skipped when they get to the top.
+    # NaN P-value (both sides constant and equal) is treated as 1.0, and NaN magnitude as 0.0.
+    def pvalue_key(cp: ChangePoint):
+        pvalue = cp.stats.pvalue
+        return -pvalue if not math.isnan(pvalue) else -1.0, cp.index
+
+    def magnitude_key(cp: ChangePoint):
+        magnitude = cp.stats.magnitude
+        return magnitude if not math.isnan(magnitude) else 0.0, cp.index
+
+    # The sequence number keeps ChangePoint objects from being compared when keys are equal.
+    sequence = count()
+    by_pvalue = [(pvalue_key(cp), next(sequence), cp) for cp in change_points]
+    by_magnitude = [(magnitude_key(cp), next(sequence), cp) for cp in change_points]
+    heapify(by_pvalue)
+    heapify(by_magnitude)
+
+    def top(heap: List) -> ChangePoint:
+        while heap[0][2] is not alive.get(heap[0][2].index):
+            heappop(heap)
+        return heap[0][2]
+
+    def push(cp: ChangePoint):
+        heappush(by_pvalue, (pvalue_key(cp), next(sequence), cp))
+        heappush(by_magnitude, (magnitude_key(cp), next(sequence), cp))
+
+    while alive:
 
         # Select the change point with weakest unacceptable P-value
         # If all points have acceptable P-values, select the change-point with
         # the least relative change:
-        weakest_cp = max(change_points, key=lambda c: c.stats.pvalue)
+        weakest_cp = top(by_pvalue)
         if weakest_cp.stats.pvalue < max_pvalue:
-            weakest_cp = min(change_points, key=lambda c: c.stats.change_magnitude())
-            if weakest_cp.stats.change_magnitude() > min_magnitude:
-                return change_points
-
-        # Remove the point from the list
-        weakest_cp_index = change_points.index(weakest_cp)
-        del change_points[weakest_cp_index]
+            weakest_cp = top(by_magnitude)
+            if weakest_cp.stats.magnitude > min_magnitude:
+                break
+
+        # Remove the point and link its neighbors together
+        index = weakest_cp.index
+        del alive[index]
+        left = prev_index.pop(index)
+        right = next_index.pop(index)
+        if left in alive:
+            next_index[left] = right
+        if right in alive:
+            prev_index[right] = left
 
         # We can't continue yet, because by removing a change_point
         # the adjacent change points changed their properties.
-        # Recompute the adjacent change point stats:
-        window_endpoints = [0] + [cp.index for cp in change_points] + [len(series)]
-
-        def recompute(index: int):
-            if index < 0 or index >= len(change_points):
-                return
-            cp = change_points[index]
-            change_points[index] = tester.change_point(cp.index, series, window_endpoints)
-
-        recompute(weakest_cp_index)
-        recompute(weakest_cp_index + 1)
-
-    return change_points
-
-
-def split(series: np.array, window_len: int = 30, max_pvalue: float = 0.001) -> List[ChangePoint]:
+        # Recompute the adjacent change point stats.
+        # Caching the stats by (window start, index, window end) would not help here,
+        # because windows only grow as points get removed, so no triple is ever seen twice:
+        for neighbor in (left, right):
+            if neighbor in alive:
+                window = (prev_index[neighbor], next_index[neighbor])
+                cp = tester.change_point_from_sums(neighbor, sums, window)
+                alive[neighbor] = cp
+                push(cp)
+
+    return [alive[i] for i in sorted(alive)]
+
+
+def split(
+    series: np.array,
+    window_len: int = 30,
+    max_pvalue: float = 0.001,
+    adaptive_step: bool = False,
+) -> List[ChangePoint]:
     """
     Finds change points by splitting the series top-down.
 
@@ -232,39 +614,202 @@ def split(series: np.array, window_len: int = 30, max_pvalue: float = 0.001) ->
     chunks (windows) of the input data instead of the full series and then merging the results.
     Each window should be large enough to contain enough points to detect a change-point.
     Consecutive windows overlap so that we won't miss changes happening between them.
+
+    With adaptive_step, the step between windows doubles after each window with
+    no change points, up to window_len - 1, so long stable stretches are scanned
+    with fewer windows. When a change point is found after such a fast skip,
+    the region since the previous window is scanned again with the normal step.
     """
     assert "Window length must be at least 2", window_len >= 2
+    # Slicing a contiguous float array gives views, so the windows below cost no copies
+    # other than the one EDivisive makes internally
+    series = np.ascontiguousarray(series, dtype=np.float64)
     start = 0
-    step = int(window_len / 2)
+    base_step = int(window_len / 2)
+    max_step = max(window_len - 1, base_step)
+    step = base_step
+    rescanned_until = -1
     indexes = []
     tester = TTestSignificanceTester(max_pvalue)
+    # EDivisive resets its state whenever it is fitted to a new series,
+    # so a single instance can be reused for all windows
+    algo = EDivisive(seed=None, calculator=DEFAULT_CALCULATOR, significance_tester=tester)
     while start < len(series):
         end = min(start + window_len, len(series))
-        calculator = cext_calculator
-        algo = EDivisive(seed=None, calculator=calculator, significance_tester=tester)
-        pts = algo.get_change_points(series[start:end])
-        new_indexes = [p.index + start for p in pts]
-        new_indexes.sort()
+        window = series[start:end]
+        if np.ptp(window) == 0:
+            # A constant window has no change points, so skip the quadratic EDivisive pass
+            new_indexes = []
+        else:
+            # Unlike get_change_points, which lists the change points in the order
+            # they were found, fit_predict returns their indexes already sorted
+            new_indexes = [i + start for i in algo.fit_predict(window)]
+        if adaptive_step:
+            if new_indexes and step > base_step and start > rescanned_until:
+                # Rescanning can't repeat forever, because each rescan ends further right
+                rescanned_until = start
+                start = max(start - step + base_step, next(iter(indexes[-1:]), 0))
+                step = base_step
+                continue
+            step = base_step if new_indexes else min(2 * step, max_step)
         last_new_change_point_index = next(iter(new_indexes[-1:]), 0)
         start = max(last_new_change_point_index, start + step)
         indexes += new_indexes
 
-    window_endpoints = [0] + indexes + [len(series)]
-    return [tester.change_point(i, series, window_endpoints) for i in indexes]
+    return tester.change_points_from_sums(indexes, PrefixSums(series))
+
+
+def refine(
+    coarse_change_points: List[ChangePoint],
+    series: np.array,
+    stride: int,
+    window_len: int = 30,
+    max_pvalue: float = 0.001,
+) -> List[ChangePoint]:
+    """
+    Locates precisely the change points found in the series subsampled with the given stride.
+    Each coarse change point is searched for again in the ±window_len neighborhood
+    of its position in the original series.
+    """
+    indexes = set()
+    for cp in coarse_change_points:
+        index = cp.index * stride
+        start = max(index - window_len, 0)
+        end = min(index + window_len, len(series))
+        indexes.update(start + p.index for p in split(series[start:end], window_len, max_pvalue))
+    tester = TTestSignificanceTester(max_pvalue)
+    return tester.change_points_from_sums(sorted(indexes), PrefixSums(series))
+
+
+def edpelt(series: np.array, min_distance: int = 1) -> List[int]:
+    """
+    Finds change points using the ED-PELT algorithm
+    (Haynes et al., 2017; Killick et al., 2012).
+
+    PELT finds the segmentation of the series that minimizes the total segment cost
+    plus a penalty for each change point, using dynamic programming. Candidates that can never
+    become optimal are pruned, which makes the expected complexity close to linear.
+    ED-PELT uses a nonparametric segment cost based on a discrete approximation
+    of the empirical distribution function, so no assumption about the
+    distribution of the data is needed.
+
+    Unlike EDivisive, this algorithm processes the whole series at once, hence it doesn't need
+    windowing to keep the running time under control.
+
+    Returns the sorted indexes of the first points after each change.
+
+    Parameters:
+        :param min_distance: minimum distance between change points
+    """
+    series = np.asarray(series, dtype=np.float64)
+    n = len(series)
+    if n <= 2:
+        return []
+    if min_distance < 1 or min_distance > n:
+        raise ValueError("min_distance must be in range [1, len(series)]")
+
+    penalty = 3 * math.log(n)
+    k = min(n, math.ceil(4 * math.log(n)))
+
+    # Partial sums of the empirical distribution function,
+    # evaluated at k quantiles of the data; each row is a prefix sum so that
+    # the cost of any segment can be computed in O(k):
+    sorted_series = np.sort(series)
+    z = -1 + (2 * np.arange(k) + 1.0) / k
+    p = 1.0 / (1 + (2 * n - 1) ** (-z))
+    quantiles = sorted_series[((n - 1) * p).astype(int)]
+    below = 2 * (series < quantiles[:, None]) + (series == quantiles[:, None])
+    partial_sums = np.zeros((k, n + 1), dtype=np.int64)
+    np.cumsum(below, axis=1, out=partial_sums[:, 1:])
+    cost_scale = 2.0 * -math.log(2 * n - 1) / k
+
+    def cost(taus: np.ndarray, end: int) -> np.ndarray:
+        """Returns the costs of segments [tau, end) for each tau"""
+        lengths = end - taus
+        sums = partial_sums[:, end, None] - partial_sums[:, taus]
+        fit = sums * 0.5 / lengths
+        with np.errstate(divide="ignore", invalid="ignore"):
+            lik = lengths * (fit * np.log(fit) + (1 - fit) * np.log(1 - fit))
+        lik[(sums == 0) | (sums == 2 * lengths)] = 0.0
+        return cost_scale * lik.sum(axis=0)
+
+    best_cost = np.zeros(n + 1)
+    best_cost[0] = -penalty
+    for tau in range(min_distance, 2 * min_distance):
+        best_cost[tau] = cost(np.array([0]), tau)[0]
+
+    prev_change_point = np.zeros(n + 1, dtype=np.int64)
+    candidates = np.array([0, min_distance])
+    for tau in range(2 * min_distance, n + 1):
+        candidate_costs = best_cost[candidates] + cost(candidates, tau) + penalty
+        best = np.argmin(candidate_costs)
+        best_cost[tau] = candidate_costs[best]
+        prev_change_point[tau] = candidates[best]
+        # Pruning: a candidate that is already worse than the optimum by more than the penalty
+        # can never be the last change point of an optimal segmentation of a longer prefix
+        candidates = candidates[candidate_costs < best_cost[tau] + penalty]
+        candidates = np.append(candidates, tau - min_distance + 1)
+
+    change_points = []
+    index = prev_change_point[n]
+    while index != 0:
+        change_points.append(int(index))
+        index = prev_change_point[index]
+    change_points.reverse()
+    return change_points
+
+
+def compute_change_points_edpelt(
+    series: np.array, max_pvalue: float = 0.001, min_magnitude: float = 0.05
+) -> List[ChangePoint]:
+    """
+    Finds change points with ED-PELT and then removes the weak ones
+    the same way as `compute_change_points`.
+    """
+    tester = TTestSignificanceTester(max_pvalue)
+    change_points = tester.change_points_from_sums(edpelt(series), PrefixSums(series))
+    return merge(change_points, series, max_pvalue, min_magnitude)
 
 
 def compute_change_points_orig(series: np.array, max_pvalue: float = 0.001) -> List[ChangePoint]:
-    calculator = cext_calculator
-    tester = QHatPermutationsSignificanceTester(calculator, pvalue=max_pvalue, permutations=100)
+    calculator = DEFAULT_CALCULATOR
+    tester = PermutationsSignificanceTester(calculator, pvalue=max_pvalue, permutations=100)
     algo = EDivisive(seed=None, calculator=calculator, significance_tester=tester)
-    pts = algo.get_change_points(series)
-    indexes = [p.index for p in pts]
-    window_endpoints = [0] + indexes + [len(series)]
-    return [tester.change_point(i, series, window_endpoints) for i in indexes]
+    indexes = algo.fit_predict(series)
+    return TTestSignificanceTester(max_pvalue).change_points_from_sums(indexes, PrefixSums(series))
 
 
 def compute_change_points(
-    series: np.array, window_len: int = 50, max_pvalue: float = 0.001, min_magnitude: float = 0.05
+    series: np.array,
+    window_len: int = 50,
+    max_pvalue: float = 0.001,
+    min_magnitude: float = 0.05,
+    *,
+    stride: int = 1,
+    adaptive_step: bool = False,
 ) -> List[ChangePoint]:
-    change_points = split(series, window_len, max_pvalue * 10)
+    """
+    Finds change points with windowed EDivisive and then removes the weak ones.
+
+    The candidates are found with a 10x looser P-value threshold than max_pvalue,
+    because the windows see only parts of the series; merge applies max_pvalue
+    to the candidates afterwards, once their stats cover whole segments.
+
+    If stride is greater than 1, EDivisive is first run on every stride-th point only,
+    and then each candidate found this way is refined by running it again on
+    the full-resolution data in the ±window_len neighborhood of the candidate.
+    This is much faster for long series, at the cost of possibly missing
+    changes that are not visible at the coarse resolution.
+    The stride must be less than window_len, otherwise a coarse candidate
+    may be further than window_len points from the actual change.
+
+    See `split` for the description of adaptive_step.
+    """
+    if stride < 1 or stride > 1 and stride >= window_len:
+        raise ValueError(f"stride must be at least 1 and less than window_len, got {stride}")
+    if stride > 1:
+        coarse_change_points = split(series[::stride], window_len, max_pvalue * 10, adaptive_step)
+        change_points = refine(coarse_change_points, series, stride, window_len, max_pvalue * 10)
+    else:
+        change_points = split(series, window_len, max_pvalue * 10, adaptive_step)
     return merge(change_points, series, max_pvalue, min_magnitude)
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Dict
+from typing import Dict, Optional
 
 from hunter.util import format_timestamp
 
@@ -8,38 +8,45 @@ def form_hyperlink_html_str(display_text: str, url: str) -> str:
     return f'<li><a href="{url}" target="_blank">{display_text}</a></li>'
 
 
-def form_created_msg_html_str() -> str:
-    formatted_time = format_timestamp(int(datetime.now().timestamp()), False)
+def form_created_msg_html_str(formatted_time: Optional[str] = None) -> str:
+    if formatted_time is None:
+        formatted_time = format_timestamp(int(datetime.now().timestamp()), False)
     return f"<p><i><sub>Created by Hunter: {formatted_time}</sub></i></p>"
 
 
-def get_back_links(attributes: Dict[str, str]) -> str:
+def get_back_links(attributes: Dict[str, str], created_time: Optional[str] = None) -> str:
     """
     This method is responsible for providing an HTML string corresponding to Fallout and GitHub
     links associated to the attributes of a Fallout-based test run.
 
     - If no GitHub commit or branch data is provided in the attributes dict, no hyperlink data
     associated to GitHub project repository is provided in the returned HTML.
+    - `created_time` is the formatted creation time put in the footer; when creating links
+    for many change points at once, format it once and pass it to every call.
     """
 
     # grabbing test runner related data (e.g. Fallout)
-    html_str = ""
+    parts = []
     if attributes.get("test_url"):
-        html_str = form_hyperlink_html_str(display_text="Test", url=attributes.get("test_url"))
+        parts = [form_hyperlink_html_str(display_text="Test", url=attributes.get("test_url"))]
 
     if attributes.get("run_url"):
-        html_str = form_hyperlink_html_str(display_text="Test run", url=attributes.get("run_url"))
+        parts = [form_hyperlink_html_str(display_text="Test run", url=attributes.get("run_url"))]
 
     # grabbing Github project repository related data
     # TODO: Will we be responsible for handling versioning from repositories aside from bdp?
     repo_url = attributes.get("repo_url", "http://github.com/riptano/bdp")
     if attributes.get("commit"):
-        html_str += form_hyperlink_html_str(
-            display_text="Git commit", url=f"{repo_url}/commit/{attributes.get('commit')}"
+        parts.append(
+            form_hyperlink_html_str(
+                display_text="Git commit", url=f"{repo_url}/commit/{attributes.get('commit')}"
+            )
         )
     elif attributes.get("branch"):
-        html_str += form_hyperlink_html_str(
-            display_text="Git branch", url=f"{repo_url}/tree/{attributes.get('branch')}"
+        parts.append(
+            form_hyperlink_html_str(
+                display_text="Git branch", url=f"{repo_url}/tree/{attributes.get('branch')}"
+            )
         )
-    html_str += form_created_msg_html_str()
-    return html_str
+    parts.append(form_created_msg_html_str(created_time))
+    return "".join(parts)
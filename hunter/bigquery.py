@@ -1,6 +1,8 @@
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict
+from functools import lru_cache
+from typing import Dict, List
 
 from google.cloud import bigquery
 from google.oauth2 import service_account
@@ -21,8 +23,21 @@ class BigQueryError(Exception):
     message: str
 
 
+@lru_cache(maxsize=None)
+def create_client(credentials_file: str) -> bigquery.Client:
+    """
+    Creates a BigQuery client authenticated with the given service account credentials.
+    Clients are cached per credentials file, so all BigQuery instances using the same
+    credentials share one client and its connections.
+    """
+    credentials = service_account.Credentials.from_service_account_file(
+        credentials_file,
+        scopes=["https://www.googleapis.com/auth/cloud-platform"],
+    )
+    return bigquery.Client(credentials=credentials, project=credentials.project_id)
+
+
 class BigQuery:
-    __client = None
     __config = None
 
     def __init__(self, config: BigQueryConfig):
@@ -30,13 +45,7 @@ class BigQuery:
 
     @property
     def client(self) -> bigquery.Client:
-        if self.__client is None:
-            credentials = service_account.Credentials.from_service_account_file(
-                self.__config.credentials,
-                scopes=["https://www.googleapis.com/auth/cloud-platform"],
-            )
-            self.__client = bigquery.Client(credentials=credentials, project=credentials.project_id)
-        return self.__client
+        return create_client(self.__config.credentials)
 
     def fetch_data(self, query: str):
         query_job = self.client.query(query)  # API request
@@ -66,3 +75,30 @@ class BigQuery:
 
         # Output the number of rows affected
         print("Affected rows: {}".format(query_job.num_dml_affected_rows))
+
+    def insert_change_points(
+        self,
+        test: BigQueryTestConfig,
+        metric_name: str,
+        attributes: List[Dict],
+        change_points: List[ChangePoint],
+    ):
+        """
+        Inserts many change points, `attributes[i]` being the attributes of `change_points[i]`.
+        The statements are independent and most of their time is spent waiting for BigQuery,
+        so they are submitted concurrently.
+        """
+        if len(change_points) <= 1:
+            for (a, cp) in zip(attributes, change_points):
+                self.insert_change_point(test, metric_name, a, cp)
+            return
+
+        # Create the client up front, so the threads don't race to create it
+        _ = self.client
+        with ThreadPoolExecutor(max_workers=min(len(change_points), 8)) as executor:
+            futures = [
+                executor.submit(self.insert_change_point, test, metric_name, a, cp)
+                for (a, cp) in zip(attributes, change_points)
+            ]
+            for f in futures:
+                f.result()
@@ -0,0 +1,97 @@
+import hashlib
+import logging
+import os
+import pickle
+import time
+from contextlib import suppress
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+from hunter.analysis import ChangePoint
+from hunter.util import write_pickle_atomically
+
+# Bump whenever the analysis changes in a way that makes previously cached results invalid
+CACHE_VERSION = 3
+
+# Entries not read nor written for that long are removed
+MAX_ENTRY_AGE = 14 * 24 * 3600
+
+# How often to look for old entries, in seconds
+EVICTION_INTERVAL = 24 * 3600
+
+
+class ChangePointCache:
+    """
+    Stores change points computed for a series of values on disk,
+    so analyzing the same data again with the same options doesn't run
+    the change point detection again.
+
+    Entries are content-addressed: the key is a hash of the values and of
+    all the parameters that affect the result, so entries never go stale;
+    new data simply produce new keys.
+    Because every new data point produces a new key, the entries of older
+    data are left behind. Reading an entry refreshes its modification time,
+    and entries unused for longer than `MAX_ENTRY_AGE` get removed when
+    new entries are written.
+    """
+
+    __dir: Path
+
+    def __init__(self, cache_dir: Path):
+        self.__dir = cache_dir
+
+    @staticmethod
+    def key(values: np.ndarray, params: Iterable) -> str:
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(repr((CACHE_VERSION, *params)).encode())
+        digest.update(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[List[ChangePoint]]:
+        path = self.__dir / f"{key}.pkl"
+        try:
+            with open(path, "rb") as f:
+                change_points = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable change point cache entry {key}: {e}")
+            return None
+        # Keeps the entry from being evicted while it is in use
+        with suppress(OSError):
+            os.utime(path)
+        return change_points
+
+    def put(self, key: str, change_points: List[ChangePoint]):
+        try:
+            write_pickle_atomically(self.__dir / f"{key}.pkl", change_points)
+        except OSError as e:
+            logging.warning(f"Failed to write change point cache entry {key}: {e}")
+            return
+        try:
+            self.__evict_old_entries()
+        except OSError as e:
+            logging.warning(f"Failed to remove old change point cache entries: {e}")
+
+    def __evict_old_entries(self):
+        # The time of the last eviction is kept as the modification time of a marker file,
+        # so the directory is scanned at most once per EVICTION_INTERVAL, not on every write
+        now = time.time()
+        marker = self.__dir / ".last-eviction"
+        try:
+            if now - marker.stat().st_mtime < EVICTION_INTERVAL:
+                return
+        except FileNotFoundError:
+            pass
+        marker.touch()
+        for path in self.__dir.iterdir():
+            if path.suffix not in (".pkl", ".tmp"):
+                continue
+            try:
+                if now - path.stat().st_mtime > MAX_ENTRY_AGE:
+                    path.unlink()
+            except FileNotFoundError:
+                # Removed concurrently by another process
+                pass
@@ -1,10 +1,16 @@
+import hashlib
+import json
+import logging
 import os
+import pickle
+import re
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
 
-from expandvars import expandvars
-from ruamel.yaml import YAML
+import yaml
+from expandvars import UnboundVariable, expandvars
 
 from hunter.bigquery import BigQueryConfig
 from hunter.grafana import GrafanaConfig
@@ -12,18 +18,77 @@ from hunter.graphite import GraphiteConfig
 from hunter.postgres import PostgresConfig
 from hunter.slack import SlackConfig
 from hunter.test_config import TestConfig, create_test_config
-from hunter.util import merge_dict_list
+from hunter.util import merge_dict_list, write_pickle_atomically
+
+# The libyaml based loader is much faster than the pure Python one,
+# but it is available only if PyYAML was built with libyaml
+try:
+    YAML_BASE_LOADER = yaml.CSafeLoader
+except AttributeError:
+    YAML_BASE_LOADER = yaml.SafeLoader
+
+YAML_BOOL_TAG = "tag:yaml.org,2002:bool"
+YAML_INT_TAG = "tag:yaml.org,2002:int"
+YAML_FLOAT_TAG = "tag:yaml.org,2002:float"
+
+
+class YamlLoader(YAML_BASE_LOADER):
+    """
+    Resolves plain scalars according to YAML 1.2, like ruamel.yaml that parsed
+    the config before. PyYAML implements YAML 1.1, which would read e.g.
+    `yes` and `off` as booleans, `1:30` as a base 60 integer and `010` as octal.
+    """
+
+    yaml_implicit_resolvers = {
+        first: [r for r in resolvers if r[0] not in (YAML_BOOL_TAG, YAML_INT_TAG, YAML_FLOAT_TAG)]
+        for (first, resolvers) in YAML_BASE_LOADER.yaml_implicit_resolvers.items()
+    }
+
+    def construct_yaml_int(self, node: yaml.ScalarNode) -> int:
+        value = self.construct_scalar(node).replace("_", "")
+        sign = -1 if value[0] == "-" else 1
+        value = value.lstrip("+-")
+        for (prefix, base) in (("0b", 2), ("0o", 8), ("0x", 16)):
+            if value.startswith(prefix):
+                return sign * int(value[2:], base)
+        return sign * int(value)
+
+
+YamlLoader.add_implicit_resolver(
+    YAML_BOOL_TAG, re.compile(r"^(?:true|True|TRUE|false|False|FALSE)$"), list("tTfF")
+)
+YamlLoader.add_implicit_resolver(
+    YAML_INT_TAG,
+    re.compile(r"^(?:[-+]?0b[0-1_]+|[-+]?0o?[0-7_]+|[-+]?[0-9_]+|[-+]?0x[0-9a-fA-F_]+)$"),
+    list("-+0123456789"),
+)
+YamlLoader.add_implicit_resolver(
+    YAML_FLOAT_TAG,
+    re.compile(
+        r"""^(?:[-+]?[0-9][0-9_]*\.[0-9_]*(?:[eE][-+]?[0-9]+)?
+        |[-+]?[0-9][0-9_]*[eE][-+]?[0-9]+
+        |[-+]?\.[0-9_]+(?:[eE][-+][0-9]+)?
+        |[-+]?\.(?:inf|Inf|INF)
+        |\.(?:nan|NaN|NAN))$""",
+        re.X,
+    ),
+    list("-+0123456789."),
+)
+YamlLoader.add_constructor(YAML_INT_TAG, YamlLoader.construct_yaml_int)
+
+YAML_LOADER = YamlLoader
 
 
 @dataclass
 class Config:
     graphite: Optional[GraphiteConfig]
     grafana: Optional[GrafanaConfig]
-    tests: Dict[str, TestConfig]
-    test_groups: Dict[str, List[TestConfig]]
+    tests: Mapping[str, TestConfig]
+    test_groups: Mapping[str, List[TestConfig]]
     slack: SlackConfig
     postgres: PostgresConfig
     bigquery: BigQueryConfig
+    cache_dir: Optional[Path] = None
 
 
 @dataclass
@@ -31,60 +96,254 @@ class ConfigError(Exception):
     message: str
 
 
+@dataclass
+class ServiceSection:
+    config_class: type
+    fields: Dict[str, str]  # field names of the config class by config key
+    allow_empty: bool = False
+
+
+# Sections configuring the external services; all their keys are required
+SERVICE_SECTIONS = {
+    "slack": ServiceSection(SlackConfig, {"token": "bot_token"}),
+    "postgres": ServiceSection(
+        PostgresConfig,
+        {key: key for key in ["hostname", "port", "username", "password", "database"]},
+    ),
+    "bigquery": ServiceSection(
+        BigQueryConfig,
+        {key: key for key in ["project_id", "dataset", "credentials"]},
+        allow_empty=True,
+    ),
+}
+
+# Plain $NAME and ${NAME} references, which don't need the full shell syntax of expandvars
+SIMPLE_ENV_VAR = re.compile(r"\$(?:\{([A-Za-z_][A-Za-z0-9_]*)\}|([A-Za-z_][A-Za-z0-9_]*))")
+
+# Identifies the version of a file: its modification time, size and inode.
+# The size and the inode tell apart a different file copied over with the same modification time
+FileStamp = Tuple[int, int, int]
+
+# Parsed configs by file, along with the stamp of the file and the environment variables
+# when it was parsed; the config depends on both, because the variables get expanded into it
+CONFIG_CACHE: Dict[Path, Tuple[FileStamp, Dict[str, str], Config]] = {}
+
+# Bump whenever parsing changes in a way that makes previously stored documents invalid
+DOCUMENT_CACHE_VERSION = 2
+
+
 def load_templates(config: Dict) -> Dict[str, Dict]:
     templates = config.get("templates", {})
-    if not isinstance(templates, Dict):
+    if not isinstance(templates, dict):
         raise ConfigError("Property `templates` is not a dictionary")
     return templates
 
 
-def load_tests(config: Dict, templates: Dict) -> Dict[str, TestConfig]:
-    tests = config.get("tests", {})
-    if not isinstance(tests, Dict):
-        raise ConfigError("Property `tests` is not a dictionary")
-
-    result = {}
-    for (test_name, test_config) in tests.items():
-        template_names = test_config.get("inherit", [])
-        if not isinstance(template_names, List):
-            template_names = [templates]
+class TestConfigs(Mapping[str, TestConfig]):
+    """
+    Test configs by name, created from the raw test definitions when first accessed.
+    Most commands use only a few of the configured tests, so there is no point in
+    merging the templates and creating the configs of all of them up-front.
+    """
+
+    __definitions: Dict[str, Dict]
+    __templates: Dict[str, Dict]
+    __tests: Dict[str, TestConfig]
+
+    def __init__(self, definitions: Dict[str, Dict], templates: Dict[str, Dict]):
+        self.__definitions = definitions
+        self.__templates = templates
+        self.__tests = {}
+
+    def __getitem__(self, test_name: str) -> TestConfig:
+        test = self.__tests.get(test_name)
+        if test is None:
+            test = self.__create(test_name, self.__definitions[test_name])
+            self.__tests[test_name] = test
+        return test
+
+    def __contains__(self, test_name: object) -> bool:
+        # The default implementation would look the test up, creating its config
+        return test_name in self.__definitions
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__definitions)
+
+    def __len__(self) -> int:
+        return len(self.__definitions)
+
+    def __create(self, test_name: str, test_config: Dict) -> TestConfig:
+        template_names = test_config.get("inherit")
+        if template_names is None:
+            # Nothing to merge; create_test_config doesn't modify the definition
+            return create_test_config(test_name, test_config)
+        if not isinstance(template_names, list):
+            template_names = [self.__templates]
         try:
-            template_list = [templates[name] for name in template_names]
+            template_list = [self.__templates[name] for name in template_names]
         except KeyError as e:
             raise ConfigError(f"Template {e.args[0]} referenced in test {test_name} not found")
         test_config = merge_dict_list(template_list + [test_config])
-        result[test_name] = create_test_config(test_name, test_config)
+        return create_test_config(test_name, test_config)
 
-    return result
+
+class TestGroups(Mapping[str, List[TestConfig]]):
+    """Lists of test configs by group name, resolved when first accessed"""
+
+    __test_names: Dict[str, List[str]]
+    __tests: Mapping[str, TestConfig]
+
+    def __init__(self, test_names: Dict[str, List[str]], tests: Mapping[str, TestConfig]):
+        self.__test_names = test_names
+        self.__tests = tests
+
+    def __getitem__(self, group_name: str) -> List[TestConfig]:
+        return [self.__tests[test_name] for test_name in self.__test_names[group_name]]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__test_names)
+
+    def __len__(self) -> int:
+        return len(self.__test_names)
 
 
-def load_test_groups(config: Dict, tests: Dict[str, TestConfig]) -> Dict[str, List[TestConfig]]:
+def load_tests(config: Dict, templates: Dict) -> Mapping[str, TestConfig]:
+    tests = config.get("tests", {})
+    if not isinstance(tests, dict):
+        raise ConfigError("Property `tests` is not a dictionary")
+    return TestConfigs(tests, templates)
+
+
+def load_test_groups(
+    config: Dict, tests: Mapping[str, TestConfig]
+) -> Mapping[str, List[TestConfig]]:
     groups = config.get("test_groups", {})
-    if not isinstance(groups, Dict):
+    if not isinstance(groups, dict):
         raise ConfigError("Property `test_groups` is not a dictionary")
 
-    result = {}
     for (group_name, test_names) in groups.items():
-        test_list = []
-        if not isinstance(test_names, List):
+        if not isinstance(test_names, list):
             raise ConfigError(f"Test group {group_name} must be a list")
-        for test_name in test_names:
-            test_config = tests.get(test_name)
-            if test_config is None:
-                raise ConfigError(f"Test {test_name} referenced by group {group_name} not found.")
-            test_list.append(test_config)
+        # Checking the names doesn't create the test configs
+        missing = [test_name for test_name in test_names if test_name not in tests]
+        if missing:
+            raise ConfigError(f"Test {missing[0]} referenced by group {group_name} not found.")
+
+    return TestGroups(groups, tests)
+
+
+def expand_env_vars(content: str) -> str:
+    """
+    Replaces references to environment variables with their values.
+    Fails on references to variables that are not set.
+    """
+    references = SIMPLE_ENV_VAR.findall(content)
+    if len(references) != content.count("$") or "\\$" in content:
+        # Some references use other syntax, e.g. default values or escapes
+        return expandvars(content, nounset=True)
+
+    def value(match: re.Match) -> str:
+        name = match.group(1) or match.group(2)
+        try:
+            return os.environ[name]
+        except KeyError:
+            raise UnboundVariable(name)
 
-        result[group_name] = test_list
+    return SIMPLE_ENV_VAR.sub(value, content)
 
+
+def load_services(config: Dict) -> Dict[str, Optional[object]]:
+    """Returns the configs of the external services by section name, None if not configured"""
+    result = {}
+    for (name, section) in SERVICE_SECTIONS.items():
+        values = config.get(name)
+        if values is None:
+            result[name] = None
+            continue
+        kwargs = {}
+        for (key, field_name) in section.fields.items():
+            value = values[key]
+            if not value and not section.allow_empty:
+                raise ValueError(f"{name}.{key}")
+            kwargs[field_name] = value
+        result[name] = section.config_class(**kwargs)
     return result
 
 
-def load_config_from(config_file: Path) -> Config:
-    """Loads config from the specified location"""
+def load_config_from(config_file: Path, document_cache_dir: Optional[Path] = None) -> Config:
+    """
+    Loads config from the specified location.
+    The parsed config is reused until the file or the environment variables change.
+
+    If document_cache_dir is given, the parsed document is also stored there,
+    so other processes can skip parsing the file as long as it is not modified.
+    """
     try:
-        content = expandvars(config_file.read_text(), nounset=True)
-        yaml = YAML(typ="safe")
-        config = yaml.load(content)
+        stat = config_file.stat()
+    except FileNotFoundError as e:
+        raise ConfigError(f"Configuration file not found: {e.filename}")
+
+    stamp = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    environ = dict(os.environ)
+    cached = CONFIG_CACHE.get(config_file)
+    if cached is not None and cached[0] == stamp and cached[1] == environ:
+        return cached[2]
+    config = parse_config(config_file, stamp, document_cache_dir)
+    CONFIG_CACHE[config_file] = (stamp, environ, config)
+    return config
+
+
+def read_config_document(
+    config_file: Path, stamp: FileStamp, document_cache_dir: Optional[Path]
+) -> Dict:
+    """
+    Reads and parses the config file into a dictionary.
+    Files with the .json suffix are parsed as JSON, other files as YAML.
+    """
+    cache_file = None
+    if document_cache_dir is not None:
+        path_hash = hashlib.blake2b(str(config_file.absolute()).encode(), digest_size=16)
+        cache_file = document_cache_dir / f"config-{path_hash.hexdigest()}.pkl"
+        try:
+            with open(cache_file, "rb") as f:
+                (cached_version, document) = pickle.load(f)
+            if cached_version == (DOCUMENT_CACHE_VERSION, stamp):
+                return document
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable config cache {cache_file}: {e}")
+
+    # The whole file is read at once, because environment variables
+    # must be expanded before parsing; most configs reference none of them,
+    # and then the parser gets the raw bytes, without decoding them to a string first
+    content = config_file.read_bytes()
+    expand = b"$" in content
+    if expand:
+        content = expand_env_vars(content.decode("utf-8"))
+    try:
+        if config_file.suffix == ".json":
+            document = json.loads(content)
+        else:
+            document = yaml.load(content, Loader=YAML_LOADER)
+    except (json.JSONDecodeError, yaml.YAMLError) as e:
+        raise ConfigError(f"Failed to parse {config_file}: {e}")
+
+    # Documents with expanded variables are not stored, because they depend on the environment
+    # and would leave the values of the variables, often credentials, on disk
+    if cache_file is not None and not expand:
+        try:
+            write_pickle_atomically(cache_file, ((DOCUMENT_CACHE_VERSION, stamp), document))
+        except OSError as e:
+            # The cache is only an optimization, e.g. a read-only home directory is fine
+            logging.debug(f"Failed to write config cache {cache_file}: {e}")
+    return document
+
+
+def parse_config(config_file: Path, stamp: FileStamp, document_cache_dir: Optional[Path]) -> Config:
+    """Reads the config file and creates the config from it"""
+    try:
+        config = read_config_document(config_file, stamp, document_cache_dir)
         """
         if Grafana configs not explicitly set in yaml file, default to same as Graphite
         server at port 3000
@@ -106,42 +365,11 @@ def load_config_from(config_file: Path) -> Config:
                 password=config["grafana"]["password"],
             )
 
-        slack_config = None
-        if config.get("slack") is not None:
-            if not config["slack"]["token"]:
-                raise ValueError("slack.token")
-            slack_config = SlackConfig(
-                bot_token=config["slack"]["token"],
-            )
+        services = load_services(config)
 
-        postgres_config = None
-        if config.get("postgres") is not None:
-            if not config["postgres"]["hostname"]:
-                raise ValueError("postgres.hostname")
-            if not config["postgres"]["port"]:
-                raise ValueError("postgres.port")
-            if not config["postgres"]["username"]:
-                raise ValueError("postgres.username")
-            if not config["postgres"]["password"]:
-                raise ValueError("postgres.password")
-            if not config["postgres"]["database"]:
-                raise ValueError("postgres.database")
-
-            postgres_config = PostgresConfig(
-                hostname=config["postgres"]["hostname"],
-                port=config["postgres"]["port"],
-                username=config["postgres"]["username"],
-                password=config["postgres"]["password"],
-                database=config["postgres"]["database"],
-            )
-
-        bigquery_config = None
-        if config.get("bigquery") is not None:
-            bigquery_config = BigQueryConfig(
-                project_id=config["bigquery"]["project_id"],
-                dataset=config["bigquery"]["dataset"],
-                credentials=config["bigquery"]["credentials"],
-            )
+        cache_dir = None
+        if config.get("cache_dir") is not None:
+            cache_dir = Path(config["cache_dir"]).expanduser()
 
         templates = load_templates(config)
         tests = load_tests(config, templates)
@@ -150,11 +378,12 @@ def load_config_from(config_file: Path) -> Config:
         return Config(
             graphite=graphite_config,
             grafana=grafana_config,
-            slack=slack_config,
-            postgres=postgres_config,
-            bigquery=bigquery_config,
+            slack=services["slack"],
+            postgres=services["postgres"],
+            bigquery=services["bigquery"],
             tests=tests,
             test_groups=groups,
+            cache_dir=cache_dir,
         )
 
     except FileNotFoundError as e:
@@ -165,21 +394,36 @@ def load_config_from(config_file: Path) -> Config:
         raise ConfigError(f"Value for configuration key not found: {e.args[0]}")
 
 
+@lru_cache(maxsize=1)
+def default_config_paths() -> Tuple[Path, ...]:
+    """
+    Returns the default config locations, in the order of preference.
+    They don't change while the process runs, so they are resolved only once.
+    """
+    return (
+        Path().home() / ".hunter/hunter.json",
+        Path().home() / ".hunter/hunter.yaml",
+        Path().home() / ".hunter/conf.yaml",
+        Path(os.path.realpath(__file__)).parent / "resources/hunter.yaml",
+    )
+
+
 def load_config() -> Config:
     """Loads config from one of the default locations"""
 
+    # The parsed document is stored as a pickle, and loading a pickle may run arbitrary code,
+    # so the cache is used only if the user explicitly points it to a trusted directory
+    env_cache_dir = os.environ.get("HUNTER_CONFIG_CACHE_DIR")
+    document_cache_dir = Path(env_cache_dir).expanduser() if env_cache_dir else None
     env_config_path = os.environ.get("HUNTER_CONFIG")
     if env_config_path:
-        return load_config_from(Path(env_config_path).absolute())
-
-    paths = [
-        Path().home() / ".hunter/hunter.yaml",
-        Path().home() / ".hunter/conf.yaml",
-        Path(os.path.realpath(__file__)).parent / "resources/hunter.yaml",
-    ]
+        return load_config_from(Path(env_config_path).absolute(), document_cache_dir)
 
+    paths = default_config_paths()
     for p in paths:
         if p.exists():
-            return load_config_from(p)
+            return load_config_from(p, document_cache_dir)
 
-    raise ConfigError(f"No configuration file found. Checked $HUNTER_CONFIG and searched: {paths}")
+    raise ConfigError(
+        f"No configuration file found. Checked $HUNTER_CONFIG and searched: {list(paths)}"
+    )
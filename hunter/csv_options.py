@@ -4,6 +4,7 @@ from dataclasses import dataclass
 
 @dataclass
 class CsvOptions:
+    __slots__ = ("delimiter", "quote_char")
     delimiter: str
     quote_char: str
 
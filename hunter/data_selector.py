@@ -1,13 +1,23 @@
 import sys
-from dataclasses import dataclass
-from datetime import datetime, timedelta
+from dataclasses import dataclass, fields
+from datetime import datetime, timedelta, timezone
 from typing import List, Optional
 
-import pytz
-
 
 @dataclass
 class DataSelector:
+    __slots__ = (
+        "branch",
+        "metrics",
+        "attributes",
+        "last_n_points",
+        "since_commit",
+        "since_version",
+        "since_time",
+        "until_commit",
+        "until_version",
+        "until_time",
+    )
     branch: Optional[str]
     metrics: Optional[List[str]]
     attributes: Optional[List[str]]
@@ -26,13 +36,13 @@ class DataSelector:
         self.last_n_points = sys.maxsize
         self.since_commit = None
         self.since_version = None
-        self.since_time = datetime.now(tz=pytz.UTC) - timedelta(days=365)
+        now = datetime.now(tz=timezone.utc)
+        self.since_time = now - timedelta(days=365)
         self.until_commit = None
         self.until_version = None
-        self.until_time = datetime.now(tz=pytz.UTC)
+        self.until_time = now
 
     def get_selection_description(self):
-        attributes = "\n".join(
-            [f"{a}: {v}" for a, v in self.__dict__.items() if not a.startswith("__") and v]
-        )
+        values = ((f.name, getattr(self, f.name)) for f in fields(self))
+        attributes = "\n".join([f"{a}: {v}" for a, v in values if v])
         return f"Data Selection\n{attributes}"
@@ -1,11 +1,14 @@
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import asdict, dataclass
 from datetime import datetime
-from typing import List, Optional
+from typing import Callable, List, Optional, Sequence
 
 import requests
 from pytz import UTC
 from requests.exceptions import HTTPError
 
+from hunter.util import MAX_CONCURRENT_REQUESTS, create_session
+
 
 @dataclass
 class GrafanaConfig:
@@ -21,6 +24,7 @@ class GrafanaError(Exception):
 
 @dataclass
 class Annotation:
+    __slots__ = ("id", "time", "text", "tags")
     id: Optional[int]
     time: datetime
     text: str
@@ -29,13 +33,12 @@ class Annotation:
 
 class Grafana:
     url: str
-    __user: str
-    __password: str
+    __session: requests.Session
 
     def __init__(self, grafana_conf: GrafanaConfig):
         self.url = grafana_conf.url
-        self.__user = grafana_conf.user
-        self.__password = grafana_conf.password
+        self.__session = create_session(retries=5)
+        self.__session.auth = (grafana_conf.user, grafana_conf.password)
 
     def fetch_annotations(
         self, start: Optional[datetime], end: Optional[datetime], tags: List[str] = None
@@ -53,9 +56,7 @@ class Grafana:
         if tags is not None:
             query_parameters["tags"] = tags
         try:
-            response = requests.get(
-                url=url, params=query_parameters, auth=(self.__user, self.__password)
-            )
+            response = self.__session.get(url=url, params=query_parameters)
             response.raise_for_status()
             json = response.json()
             annotations = []
@@ -81,26 +82,48 @@ class Grafana:
         - https://grafana.com/docs/grafana/latest/http_api/annotations/#delete-annotation-by-id
         """
         url = f"{self.url}api/annotations"
-        for annotation_id in ids:
-            annotation_url = f"{url}/{annotation_id}"
-            try:
-                response = requests.delete(url=annotation_url, auth=(self.__user, self.__password))
-                response.raise_for_status()
-            except HTTPError as err:
-                raise GrafanaError(str(err))
+
+        def delete(annotation_id: int):
+            response = self.__session.delete(url=f"{url}/{annotation_id}")
+            response.raise_for_status()
+
+        try:
+            self.__send_concurrently(delete, ids)
+        except HTTPError as err:
+            raise GrafanaError(str(err))
 
     def create_annotations(self, *annotations: Annotation):
         """
         Reference:
         - https://grafana.com/docs/grafana/latest/http_api/annotations/#create-annotation
         """
+        url = f"{self.url}api/annotations"
+
+        def create(annotation: Annotation):
+            data = asdict(annotation)
+            data["time"] = int(annotation.time.timestamp() * 1000)
+            del data["id"]
+            response = self.__session.post(url=url, data=data)
+            response.raise_for_status()
+
         try:
-            url = f"{self.url}api/annotations"
-            for annotation in annotations:
-                data = asdict(annotation)
-                data["time"] = int(annotation.time.timestamp() * 1000)
-                del data["id"]
-                response = requests.post(url=url, data=data, auth=(self.__user, self.__password))
-                response.raise_for_status()
+            self.__send_concurrently(create, annotations)
         except HTTPError as err:
             raise GrafanaError(str(err))
+
+    @staticmethod
+    def __send_concurrently(send: Callable, items: Sequence):
+        """
+        Calls `send` for each item. The requests are independent and their time
+        is spent mostly waiting for Grafana, so they are sent from multiple threads.
+        Raises the first error in the order of items, after all requests complete.
+        """
+        if len(items) <= 1:
+            for item in items:
+                send(item)
+            return
+
+        with ThreadPoolExecutor(max_workers=min(len(items), MAX_CONCURRENT_REQUESTS)) as executor:
+            futures = [executor.submit(send, item) for item in items]
+        for f in futures:
+            f.result()
@@ -1,13 +1,23 @@
 import ast
-import json
-import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timezone
 from logging import info
-from typing import Dict, Iterable, List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import requests
+from requests.utils import requote_uri
 
 from hunter.data_selector import DataSelector
-from hunter.util import parse_datetime
+from hunter.util import MAX_CONCURRENT_REQUESTS, create_session, parse_datetime
+
+# Render responses can be large arrays of numbers, which orjson parses several times faster.
+# It is an optional dependency; it accepts the raw response bytes just like json.loads.
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
 
 
 @dataclass
@@ -15,22 +25,37 @@ class GraphiteConfig:
     url: str
 
 
-@dataclass
-class DataPoint:
-    time: int
-    value: float
-
-
 @dataclass
 class TimeSeries:
+    """
+    Points of a Graphite series that have values, as parallel arrays sorted by time.
+    """
+
     path: str
-    points: List[DataPoint]
+    times: np.ndarray  # int64 timestamps
+    values: np.ndarray  # float64 values
 
 
-def decode_graphite_datapoints(series: Dict[str, List[List[float]]]) -> List[DataPoint]:
+def decode_graphite_datapoints(
+    series: Dict[str, List[List[Optional[float]]]]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the times and values of the points of the series that have a value"""
+    # Missing values (nulls) become NaNs; reshape handles series with no points at all
+    points = np.array(series["datapoints"], dtype=np.float64).reshape(-1, 2)
+    present = ~np.isnan(points[:, 0])
+    return points[present, 1].astype(np.int64), points[present, 0]
 
-    points = series["datapoints"]
-    return [DataPoint(int(p[1]), p[0]) for p in points if p[0] is not None]
+
+def decode_event_data(data: str) -> Dict:
+    """
+    Decodes the data of a Graphite event.
+    The data is usually JSON, which is much faster to parse than a Python literal,
+    but events published as Python dict literals are supported as well.
+    """
+    try:
+        return json_loads(data)
+    except ValueError:
+        return ast.literal_eval(data)
 
 
 def to_graphite_time(time: datetime, default: str) -> str:
@@ -44,13 +69,41 @@ def to_graphite_time(time: datetime, default: str) -> str:
         return default
 
 
+def parse_graphite_time(time) -> datetime:
+    """
+    Converts a Unix timestamp, as Graphite events store their times, to a datetime.
+    Other values go through the generic, but much slower, date parser.
+    """
+    try:
+        return datetime.fromtimestamp(float(time), tz=timezone.utc)
+    except (TypeError, ValueError, OverflowError):
+        return parse_datetime(str(time))
+
+
 @dataclass
 class GraphiteError(IOError):
     message: str
 
 
+def none_if_null(value: Optional[str]) -> Optional[str]:
+    """Graphite events store missing values as empty or "null" strings"""
+    return None if not value or value == "null" else value
+
+
 @dataclass
 class GraphiteEvent:
+    __slots__ = (
+        "test_owner",
+        "test_name",
+        "run_id",
+        "status",
+        "start_time",
+        "pub_time",
+        "end_time",
+        "version",
+        "branch",
+        "commit",
+    )
     test_owner: str
     test_name: str
     run_id: str
@@ -79,21 +132,12 @@ class GraphiteEvent:
         self.test_name = test_name
         self.run_id = run_id
         self.status = status
-        self.start_time = parse_datetime(str(start_time))
-        self.pub_time = parse_datetime(str(pub_time))
-        self.end_time = parse_datetime(str(end_time))
-        if len(version) == 0 or version == "null":
-            self.version = None
-        else:
-            self.version = version
-        if len(branch) == 0 or branch == "null":
-            self.branch = None
-        else:
-            self.branch = branch
-        if len(commit) == 0 or commit == "null":
-            self.commit = None
-        else:
-            self.commit = commit
+        self.start_time = parse_graphite_time(start_time)
+        self.pub_time = parse_graphite_time(pub_time)
+        self.end_time = parse_graphite_time(end_time)
+        self.version = none_if_null(version)
+        self.branch = none_if_null(branch)
+        self.commit = none_if_null(commit)
 
 
 def compress_target_paths(paths: List[str]) -> List[str]:
@@ -101,17 +145,11 @@ def compress_target_paths(paths: List[str]) -> List[str]:
     result = []
     prefix_map = {}
     for p in paths:
-        components = p.rsplit(".", 1)
-        if len(components) == 1:
+        (prefix, separator, suffix) = p.rpartition(".")
+        if not separator:
             result.append(p)
             continue
-
-        prefix = components[0]
-        suffix = components[1]
-        if prefix not in prefix_map:
-            prefix_map[prefix] = [suffix]
-        else:
-            prefix_map[prefix].append(suffix)
+        prefix_map.setdefault(prefix, []).append(suffix)
 
     for prefix, suffixes in prefix_map.items():
         if len(suffixes) > 1:
@@ -125,10 +163,18 @@ def compress_target_paths(paths: List[str]) -> List[str]:
 class Graphite:
     __url: str
     __url_limit: int  # max URL length used when requesting metrics from Graphite
+    __session: requests.Session
 
     def __init__(self, conf: GraphiteConfig):
         self.__url = conf.url
         self.__url_limit = 4094
+        self.__session = create_session(retries=3)
+
+    def __get(self, url: str) -> bytes:
+        """Returns the body of the response; raises an IOError if the request failed"""
+        response = self.__session.get(url)
+        response.raise_for_status()
+        return response.content
 
     def fetch_events(
         self,
@@ -158,10 +204,10 @@ class Graphite:
                 f"&until={until_time}"
                 f"&set=intersection"
             )
-            data_str = urllib.request.urlopen(url).read()
-            data_as_json = json.loads(data_str)
+            data_str = self.__get(url)
+            data_as_json = json_loads(data_str)
             return [
-                GraphiteEvent(event.get("when"), **ast.literal_eval(event.get("data")))
+                GraphiteEvent(event.get("when"), **decode_event_data(event.get("data")))
                 for event in data_as_json
                 if event.get("what") == "Performance Test"
             ]
@@ -174,7 +220,7 @@ class Graphite:
     ) -> List[GraphiteEvent]:
         events = []
         if commit is not None:
-            events = list(filter(lambda e: e.commit == commit, self.fetch_events(tags)))
+            events = [e for e in self.fetch_events(tags) if e.commit == commit]
         elif version is not None:
             tags = [*tags, version]
             events = self.fetch_events(tags)
@@ -192,25 +238,47 @@ class Graphite:
             from_time = to_graphite_time(selector.since_time, "-365d")
             until_time = to_graphite_time(selector.until_time, "now")
             target_paths = compress_target_paths(target_paths)
-            targets = ""
-            for path in target_paths:
-                targets += f"target={path}&"
-            targets = targets.strip("&")
 
-            url = (
-                f"{self.__url}render"
-                f"?{targets}"
-                f"&format=json"
-                f"&from={from_time}"
-                f"&until={until_time}"
-            )
-
-            data_str = urllib.request.urlopen(url).read()
-            data_as_json = json.loads(data_str)
-
-            for s in data_as_json:
-                series = TimeSeries(path=s["target"], points=decode_graphite_datapoints(s))
-                result.append(series)
+            def render_url(paths: List[str]) -> str:
+                targets = "&".join(f"target={path}" for path in paths)
+                return (
+                    f"{self.__url}render"
+                    f"?{targets}"
+                    f"&format=json"
+                    f"&from={from_time}"
+                    f"&until={until_time}"
+                )
+
+            # Split the targets into as few requests as possible, keeping the URLs within the limit.
+            # The lengths are measured after quoting, the way requests sends the URLs,
+            # because quoting makes some characters, e.g. the braces of compressed paths, longer
+            urls = []
+            batch = []
+            base_len = len(requote_uri(render_url([])))
+            url_len = base_len
+            for path in target_paths:
+                target_len = len(requote_uri(f"&target={path}"))
+                if batch and url_len + target_len > self.__url_limit:
+                    urls.append(render_url(batch))
+                    batch = []
+                    url_len = base_len
+                batch.append(path)
+                url_len += target_len
+            if batch:
+                urls.append(render_url(batch))
+
+            # The requests are independent, so they are sent concurrently
+            if len(urls) > 1:
+                with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+                    responses = list(executor.map(self.__get, urls))
+            else:
+                responses = [self.__get(url) for url in urls]
+
+            for data_str in responses:
+                for s in json_loads(data_str):
+                    (times, values) = decode_graphite_datapoints(s)
+                    series = TimeSeries(path=s["target"], times=times, values=values)
+                    result.append(series)
 
             return result
 
@@ -227,8 +295,8 @@ class Graphite:
             paths = []
         try:
             url = f"{self.__url}metrics/find?query={prefix}"
-            data_str = urllib.request.urlopen(url).read()
-            data_as_json = json.loads(data_str)
+            data_str = self.__get(url)
+            data_as_json = json_loads(data_str)
             for result in data_as_json:
                 curr_path = result["id"]
                 if result["leaf"]:
@@ -10,7 +10,7 @@ from typing import Dict, List, Optional
 from hunter.bigquery import BigQuery
 from hunter.config import Config
 from hunter.data_selector import DataSelector
-from hunter.graphite import DataPoint, Graphite, GraphiteError
+from hunter.graphite import Graphite, GraphiteError, TimeSeries
 from hunter.postgres import Postgres
 from hunter.series import Metric, Series
 from hunter.test_config import (
@@ -117,11 +117,11 @@ class GraphiteImporter(Importer):
             if not graphite_result:
                 raise DataImportError(f"No timeseries found in Graphite for test {test.name}.")
 
-            times = [[x.time for x in series.points] for series in graphite_result]
+            times = [series.times.tolist() for series in graphite_result]
             time: List[int] = merge_sorted(times)[-selector.last_n_points :]
 
-            def column(series: List[DataPoint]) -> List[float]:
-                value_by_time = dict([(x.time, x.value) for x in series])
+            def column(series: TimeSeries) -> List[float]:
+                value_by_time = dict(zip(series.times.tolist(), series.values.tolist()))
                 return [value_by_time.get(t) for t in time]
 
             # Keep order of the keys in the result values the same as order of metrics
@@ -129,7 +129,7 @@ class GraphiteImporter(Importer):
             for m in metrics:
                 values[m.name] = []
             for ts in graphite_result:
-                values[path_to_metric[ts.path].name] = column(ts.points)
+                values[path_to_metric[ts.path].name] = column(ts)
             for m in metrics:
                 if len(values[m.name]) == 0:
                     del values[m.name]
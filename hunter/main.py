@@ -28,7 +28,7 @@ from hunter.test_config import (
     TestConfig,
     TestConfigError,
 )
-from hunter.util import DateFormatError, interpolate, parse_datetime
+from hunter.util import DateFormatError, format_timestamp, interpolate, parse_datetime
 
 
 @dataclass
@@ -127,6 +127,7 @@ class Hunter:
         logging.info(f"Found {len(old_annotations_for_test)} annotations")
 
         created_count = 0
+        created_time = format_timestamp(int(datetime.now().timestamp()), False)
         for metric_name, change_points in series.change_points.items():
             path = test.get_path(series.branch_name(), metric_name)
             metric_tag = f"metric:{metric_name}"
@@ -158,7 +159,7 @@ class Hunter:
             target_annotations = []
             for cp in change_points:
                 attributes = series.attributes_at(cp.index)
-                annotation_text = get_back_links(attributes)
+                annotation_text = get_back_links(attributes, created_time)
                 target_annotations.append(
                     Annotation(
                         id=None,
@@ -235,9 +236,8 @@ class Hunter:
     def update_bigquery(self, test: BigQueryTestConfig, series: AnalyzedSeries):
         bigquery = self.__get_bigquery()
         for metric_name, change_points in series.change_points.items():
-            for cp in change_points:
-                attributes = series.attributes_at(cp.index)
-                bigquery.insert_change_point(test, metric_name, attributes, cp)
+            attributes = [series.attributes_at(cp.index) for cp in change_points]
+            bigquery.insert_change_points(test, metric_name, attributes, change_points)
 
     def regressions(
         self, test: TestConfig, selector: DataSelector, options: AnalysisOptions
@@ -474,7 +474,9 @@ def setup_analysis_options_parser(parser: argparse.ArgumentParser):
         "as noise so it is best to keep it short enough to include not more "
         "than a few change points (optimally at most 1)",
     )
-    parser.add_argument(
+    # Each selects a different algorithm, so they can't be combined
+    algorithm = parser.add_mutually_exclusive_group()
+    algorithm.add_argument(
         "--orig-edivisive",
         type=bool,
         default=False,
@@ -482,6 +484,29 @@ def setup_analysis_options_parser(parser: argparse.ArgumentParser):
         help="use the original edivisive algorithm with no windowing "
         "and weak change points analysis improvements",
     )
+    algorithm.add_argument(
+        "--edpelt",
+        action="store_true",
+        dest="edpelt",
+        help="use the ED-PELT algorithm which analyzes the whole series at once "
+        "with no windowing; faster than edivisive on long series",
+    )
+    parser.add_argument(
+        "--adaptive-step",
+        action="store_true",
+        dest="adaptive_step",
+        help="move the analysis window faster over the parts of the series "
+        "with no change points; speeds up the analysis of long stable series",
+    )
+    parser.add_argument(
+        "--stride",
+        default=1,
+        type=int,
+        dest="stride",
+        help="look for change points in every n-th data point first, then locate "
+        "them precisely in the full data; speeds up the analysis of long series "
+        "at the cost of possibly missing short changes; must be less than the window",
+    )
 
 
 def analysis_options_from_args(args: argparse.Namespace) -> AnalysisOptions:
@@ -494,6 +519,16 @@ def analysis_options_from_args(args: argparse.Namespace) -> AnalysisOptions:
         conf.window_len = args.window
     if args.orig_edivisive is not None:
         conf.orig_edivisive = args.orig_edivisive
+    if args.edpelt is not None:
+        conf.edpelt = args.edpelt
+    if args.adaptive_step is not None:
+        conf.adaptive_step = args.adaptive_step
+    if args.stride is not None:
+        if args.stride < 1 or args.stride > 1 and args.stride >= conf.window_len:
+            raise HunterError(
+                f"Stride must be at least 1 and less than the window size {conf.window_len}"
+            )
+        conf.stride = args.stride
     return conf
 
 
@@ -607,6 +642,7 @@ def script_main(conf: Config, args: List[str] = None):
             slack_cph_since = parse_datetime(args.cph_report_since)
             data_selector = data_selector_from_args(args)
             options = analysis_options_from_args(args)
+            options.cache_dir = conf.cache_dir
             report_type = args.report_type
             tests = hunter.get_tests(*args.tests)
             tests_analyzed_series = {test.name: None for test in tests}
@@ -650,6 +686,7 @@ def script_main(conf: Config, args: List[str] = None):
         if args.command == "regressions":
             data_selector = data_selector_from_args(args)
             options = analysis_options_from_args(args)
+            options.cache_dir = conf.cache_dir
             tests = hunter.get_tests(*args.tests)
             regressing_test_count = 0
             errors = 0
@@ -687,6 +724,9 @@ def script_main(conf: Config, args: List[str] = None):
         if args.command is None:
             parser.print_usage()
 
+    except ConfigError as err:
+        logging.error(err.message)
+        exit(1)
     except TestConfigError as err:
         logging.error(err.message)
         exit(1)
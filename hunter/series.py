@@ -1,18 +1,38 @@
 import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
-from itertools import groupby
+from itertools import repeat
+from pathlib import Path
 from typing import Dict, Iterable, List, Optional
 
 import numpy as np
 
+from hunter import analysis
 from hunter.analysis import (
     ComparativeStats,
     TTestSignificanceTester,
     compute_change_points,
+    compute_change_points_edpelt,
     compute_change_points_orig,
     fill_missing,
 )
+from hunter.cache import ChangePointCache
+
+# The analysis takes about 4 µs per point in the current process. Starting 4 worker processes
+# took 35-75 ms with fork and about 2 s with spawn (the default on macOS and Windows),
+# so with 4 workers, they pay off only for series with more points in total than:
+PARALLEL_MIN_POINTS_FORK = 25_000
+PARALLEL_MIN_POINTS_SPAWN = 700_000
+
+
+def default_parallel_min_points() -> int:
+    """Returns the minimum number of points worth analyzing in worker processes"""
+    if multiprocessing.get_start_method() == "fork":
+        return PARALLEL_MIN_POINTS_FORK
+    return PARALLEL_MIN_POINTS_SPAWN
 
 
 @dataclass
@@ -21,12 +41,23 @@ class AnalysisOptions:
     max_pvalue: float
     min_magnitude: float
     orig_edivisive: bool
+    edpelt: bool
+    adaptive_step: bool
+    stride: int
+    parallel_min_points: Optional[int]
+    cache_dir: Optional[Path]
 
     def __init__(self):
         self.window_len = 50
         self.max_pvalue = 0.001
         self.min_magnitude = 0.0
         self.orig_edivisive = False
+        self.edpelt = False
+        self.adaptive_step = False
+        self.stride = 1
+        # None selects the default for the way the worker processes are started
+        self.parallel_min_points = None
+        self.cache_dir = None
 
 
 @dataclass
@@ -45,6 +76,7 @@ class Metric:
 class ChangePoint:
     """A change-point for a single metric"""
 
+    __slots__ = ("metric", "index", "time", "stats")
     metric: str
     index: int
     time: int
@@ -139,10 +171,7 @@ class Series:
         assert all(len(x) == len(time) for x in attributes.values())
 
     def attributes_at(self, index: int) -> Dict[str, str]:
-        result = {}
-        for (k, v) in self.attributes.items():
-            result[k] = v[index]
-        return result
+        return {k: v[index] for (k, v) in self.attributes.items()}
 
     def find_first_not_earlier_than(self, time: datetime) -> Optional[int]:
         timestamp = time.timestamp()
@@ -153,17 +182,74 @@ class Series:
 
     def find_by_attribute(self, name: str, value: str) -> List[int]:
         """Returns the indexes of data points with given attribute value"""
-        result = []
-        for i in range(len(self.time)):
-            if self.attributes_at(i).get(name) == value:
-                result.append(i)
-        return result
+        column = self.attributes.get(name)
+        if column is None:
+            return list(range(len(self.time))) if value is None else []
+        return [i for (i, v) in enumerate(column) if v == value]
 
     def analyze(self, options: AnalysisOptions = AnalysisOptions()) -> "AnalyzedSeries":
         logging.info(f"Computing change points for test {self.test_name}...")
         return AnalyzedSeries(self, options)
 
 
+def detect_change_points(
+    values: np.ndarray, options: AnalysisOptions
+) -> List[analysis.ChangePoint]:
+    """
+    Finds change points in the values of a single metric.
+    Missing values are filled in place.
+    Reuses the change points stored in the cache if `options.cache_dir` is set.
+    """
+    if options.orig_edivisive and options.edpelt:
+        raise ValueError("orig_edivisive and edpelt select different algorithms")
+    values = fill_missing(values)
+    if len(values) == 0 or np.ptp(values) == 0:
+        # Nothing can change in a constant metric
+        return []
+    cache = ChangePointCache(options.cache_dir) if options.cache_dir else None
+    if cache is not None:
+        key = ChangePointCache.key(
+            values,
+            (
+                options.window_len,
+                options.max_pvalue,
+                options.min_magnitude,
+                options.orig_edivisive,
+                options.edpelt,
+                options.adaptive_step,
+                options.stride,
+            ),
+        )
+        change_points = cache.get(key)
+        if change_points is not None:
+            return change_points
+
+    if options.orig_edivisive:
+        change_points = compute_change_points_orig(
+            values,
+            max_pvalue=options.max_pvalue,
+        )
+    elif options.edpelt:
+        change_points = compute_change_points_edpelt(
+            values,
+            max_pvalue=options.max_pvalue,
+            min_magnitude=options.min_magnitude,
+        )
+    else:
+        change_points = compute_change_points(
+            values,
+            window_len=options.window_len,
+            max_pvalue=options.max_pvalue,
+            min_magnitude=options.min_magnitude,
+            adaptive_step=options.adaptive_step,
+            stride=options.stride,
+        )
+
+    if cache is not None:
+        cache.put(key, change_points)
+    return change_points
+
+
 class AnalyzedSeries:
     """
     Time series data with computed change points.
@@ -184,49 +270,50 @@ class AnalyzedSeries:
     def __compute_change_points(
         series: Series, options: AnalysisOptions
     ) -> Dict[str, List[ChangePoint]]:
-        result = {}
-        for metric in series.data.keys():
-            values = series.data[metric].copy()
-            fill_missing(values)
-            if options.orig_edivisive:
-                change_points = compute_change_points_orig(
-                    values,
-                    max_pvalue=options.max_pvalue,
-                )
-            else:
-                change_points = compute_change_points(
-                    values,
-                    window_len=options.window_len,
-                    max_pvalue=options.max_pvalue,
-                    min_magnitude=options.min_magnitude,
-                )
-            result[metric] = []
-            for c in change_points:
-                result[metric].append(
-                    ChangePoint(
-                        index=c.index, time=series.time[c.index], metric=metric, stats=c.stats
-                    )
-                )
-        return result
+        # Metrics are analyzed independently, so they can be analyzed in parallel.
+        # Worker processes are used, because a good deal of the analysis
+        # (e.g. the split and merge loops) is Python code holding the GIL.
+        metrics = list(series.data.keys())
+        values = [np.array(series.data[metric], dtype=np.float64) for metric in metrics]
+        workers = min(len(metrics), os.cpu_count() or 1)
+        min_points = options.parallel_min_points
+        if workers > 1 and min_points is None:
+            min_points = default_parallel_min_points()
+        if workers <= 1 or sum(len(v) for v in values) < min_points:
+            results = [detect_change_points(v, options) for v in values]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(detect_change_points, values, repeat(options)))
+
+        return {
+            metric: [
+                ChangePoint(index=c.index, time=series.time[c.index], metric=metric, stats=c.stats)
+                for c in change_points
+            ]
+            for metric, change_points in zip(metrics, results)
+        }
 
     @staticmethod
     def __group_change_points_by_time(
         series: Series, change_points: Dict[str, List[ChangePoint]]
     ) -> List[ChangePointGroup]:
-        changes: List[ChangePoint] = []
-        for metric in change_points.keys():
-            changes += change_points[metric]
-
-        changes.sort(key=lambda c: c.index)
+        # Bucket the changes by index; within a bucket, changes keep the order of metrics
+        changes_by_index: Dict[int, List[ChangePoint]] = {}
+        for metric_change_points in change_points.values():
+            for c in metric_change_points:
+                changes_by_index.setdefault(c.index, []).append(c)
+
+        attribute_names = list(series.attributes.keys())
+        attribute_columns = list(series.attributes.values())
         points = []
-        for k, g in groupby(changes, key=lambda c: c.index):
+        for k in sorted(changes_by_index):
             cp = ChangePointGroup(
                 index=k,
                 time=series.time[k],
                 prev_time=series.time[k - 1],
-                attributes=series.attributes_at(k),
-                prev_attributes=series.attributes_at(k - 1),
-                changes=list(g),
+                attributes=dict(zip(attribute_names, (c[k] for c in attribute_columns))),
+                prev_attributes=dict(zip(attribute_names, (c[k - 1] for c in attribute_columns))),
+                changes=changes_by_index[k],
             )
             points.append(cp)
 
@@ -306,20 +393,24 @@ def compare(
     # if index not specified, we want to take the most recent performance
     index_1 = index_1 if index_1 is not None else len(series_1.time())
     index_2 = index_2 if index_2 is not None else len(series_2.time())
-    metrics = filter(lambda m: m in series_2.metric_names(), series_1.metric_names())
+    metrics_2 = series_2.metric_names()
+    metrics = [m for m in series_1.metric_names() if m in metrics_2]
 
     tester = TTestSignificanceTester(series_1.options.max_pvalue)
     stats = {}
 
+    def present_values(data: List[float], begin: int, end: int) -> np.ndarray:
+        # None becomes NaN in a float array, so missing values are dropped in one pass
+        values = np.array(data[begin:end], dtype=np.float64)
+        return values[~np.isnan(values)]
+
     for metric in metrics:
-        data_1 = series_1.data(metric)
         (begin_1, end_1) = series_1.get_stable_range(metric, index_1)
-        data_1 = [x for x in data_1[begin_1:end_1] if x is not None]
+        data_1 = present_values(series_1.data(metric), begin_1, end_1)
 
-        data_2 = series_2.data(metric)
         (begin_2, end_2) = series_2.get_stable_range(metric, index_2)
-        data_2 = [x for x in data_2[begin_2:end_2] if x is not None]
+        data_2 = present_values(series_2.data(metric), begin_2, end_2)
 
-        stats[metric] = tester.compare(np.array(data_1), np.array(data_2))
+        stats[metric] = tester.compare(data_1, data_2)
 
     return SeriesComparison(series_1, series_2, index_1, index_2, stats)
@@ -228,10 +228,10 @@ def create_csv_test_config(test_name: str, test_info: Dict) -> CsvTestConfig:
     time_column = test_info.get("time_column", "time")
     metrics_info = test_info.get("metrics")
     metrics = []
-    if isinstance(metrics_info, List):
+    if isinstance(metrics_info, list):
         for name in metrics_info:
             metrics.append(CsvMetric(name, 1, 1.0, name))
-    elif isinstance(metrics_info, Dict):
+    elif isinstance(metrics_info, dict):
         for metric_name, metric_conf in metrics_info.items():
             metrics.append(
                 CsvMetric(
@@ -245,7 +245,7 @@ def create_csv_test_config(test_name: str, test_info: Dict) -> CsvTestConfig:
         raise TestConfigError(f"Metrics of the test {test_name} must be a list or dictionary")
 
     attributes = test_info.get("attributes", [])
-    if not isinstance(attributes, List):
+    if not isinstance(attributes, list):
         raise TestConfigError(f"Attributes of the test {test_name} must be a list")
 
     if test_info.get("csv_options"):
@@ -264,7 +264,7 @@ def create_csv_test_config(test_name: str, test_info: Dict) -> CsvTestConfig:
 def create_graphite_test_config(name: str, test_info: Dict) -> GraphiteTestConfig:
     try:
         metrics_info = test_info["metrics"]
-        if not isinstance(metrics_info, Dict):
+        if not isinstance(metrics_info, dict):
             raise TestConfigError(f"Test {name} metrics field is not a dictionary.")
     except KeyError as e:
         raise TestConfigError(f"Configuration key not found in test {name}: {e.args[0]}")
@@ -315,10 +315,10 @@ def create_postgres_test_config(test_name: str, test_info: Dict) -> PostgresTest
         update_stmt = test_info.get("update_statement", "")
 
         metrics = []
-        if isinstance(metrics_info, List):
+        if isinstance(metrics_info, list):
             for name in metrics_info:
                 metrics.append(CsvMetric(name, 1, 1.0))
-        elif isinstance(metrics_info, Dict):
+        elif isinstance(metrics_info, dict):
             for metric_name, metric_conf in metrics_info.items():
                 metrics.append(
                     PostgresMetric(
@@ -345,10 +345,10 @@ def create_bigquery_test_config(test_name: str, test_info: Dict) -> PostgresTest
         update_stmt = test_info.get("update_statement", "")
 
         metrics = []
-        if isinstance(metrics_info, List):
+        if isinstance(metrics_info, list):
             for name in metrics_info:
                 metrics.append(CsvMetric(name, 1, 1.0))
-        elif isinstance(metrics_info, Dict):
+        elif isinstance(metrics_info, dict):
             for metric_name, metric_conf in metrics_info.items():
                 metrics.append(
                     PostgresMetric(
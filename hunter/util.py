@@ -1,16 +1,28 @@
 import math
+import os
+import pickle
 import re
 import sys
+import tempfile
 from collections import OrderedDict, deque
+from contextlib import suppress
 from dataclasses import dataclass
 from datetime import datetime
 from functools import reduce
 from itertools import islice
-from typing import Dict, List, Optional, Set, TypeVar
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, TypeVar
 
 import dateparser
 from pytz import UTC
 
+if TYPE_CHECKING:
+    import requests
+
+# Independent HTTP requests, e.g. to create many annotations or to fetch many metrics,
+# are sent concurrently, up to this many at a time
+MAX_CONCURRENT_REQUESTS = 8
+
 
 def resolution(time: List[int]) -> int:
     """
@@ -22,9 +34,10 @@ def resolution(time: List[int]) -> int:
     res = 24 * 3600
     if len(time) < 2:
         return res
-    for (a, b) in sliding_window(time, 2):
-        if b - a > 0:
-            res = min(res, b - a)
+    for i in range(1, len(time)):
+        diff = time[i] - time[i - 1]
+        if 0 < diff < res:
+            res = diff
     for t in time:
         res = math.gcd(res, t)
     return res
@@ -182,11 +195,11 @@ def merge_dicts(d1: Dict, d2: Dict) -> OrderedDict:
             result[k] = v1
         elif v1 is None:
             result[k] = v2
-        elif isinstance(v1, Dict) and isinstance(v2, Dict):
+        elif isinstance(v1, dict) and isinstance(v2, dict):
             result[k] = merge_dicts(v1, v2)
-        elif isinstance(v1, List) and isinstance(v2, List):
+        elif isinstance(v1, list) and isinstance(v2, list):
             result[k] = v1 + v2
-        elif isinstance(v1, Set) and isinstance(v2, Set):
+        elif isinstance(v1, set) and isinstance(v2, set):
             result[k] = v1 | v2
         else:
             result[k] = v2
@@ -230,3 +243,48 @@ def interpolate(s: str, vars: Dict[str, List[str]]) -> List[str]:
         return result
     else:
         return [s]
+
+
+def write_pickle_atomically(path: Path, obj: Any):
+    """
+    Pickles the object into the file at given path, creating the parent directory if needed.
+    The object is written to a temporary file first, which then replaces the target file,
+    so concurrent readers never see a partially written file.
+    Raises OSError if the file can't be written.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with suppress(OSError):
+            os.unlink(tmp_path)
+        raise
+
+
+def create_session(retries: int) -> "requests.Session":
+    """
+    Creates an HTTP session that keeps the connections open between requests
+    and can keep up to MAX_CONCURRENT_REQUESTS connections per host.
+    Idempotent requests (not POST) failing with a transient error are retried
+    up to the given number of times. Once the retries are exhausted, the last
+    response is returned, so raise_for_status reports its status as usual.
+    """
+    # Imported only when needed, so the analysis code using this module doesn't pay for it
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(
+        total=retries,
+        backoff_factor=0.2,
+        status_forcelist=[429, 502, 503, 504],
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(max_retries=retry, pool_maxsize=MAX_CONCURRENT_REQUESTS)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
@@ -1,20 +1,48 @@
+import math
+
 import numpy as np
+import pytest
+from scipy.stats import ttest_ind_from_stats
+from signal_processing_algorithms.e_divisive.calculators import (
+    cext_calculator,
+    numpy_calculator,
+)
 from signal_processing_algorithms.e_divisive.change_points import EDivisiveChangePoint
 
-from hunter.analysis import TTestSignificanceTester, compute_change_points, fill_missing
+from hunter import numba_calculator
+from hunter.analysis import (
+    ComparativeStats,
+    ExtendedSignificanceTester,
+    NumpyCalculator,
+    PermutationsSignificanceTester,
+    PrefixSums,
+    TTestSignificanceTester,
+    compute_change_points,
+    compute_change_points_edpelt,
+    compute_change_points_orig,
+    edpelt,
+    fill_missing,
+    load_calculator,
+    mean_and_std,
+    ttest_pvalue,
+)
 
 
 def test_fill_missing():
     list1 = [None, None, 1.0, 1.2, 0.5]
     list2 = [1.0, 1.2, None, None, 4.3]
     list3 = [1.0, 1.2, 0.5, None, None]
-    fill_missing(list1)
+    assert fill_missing(list1).tolist() == [1.0, 1.0, 1.0, 1.2, 0.5]
     fill_missing(list2)
     fill_missing(list3)
     assert list1 == [1.0, 1.0, 1.0, 1.2, 0.5]
     assert list2 == [1.0, 1.2, 1.2, 1.2, 4.3]
     assert list3 == [1.0, 1.2, 0.5, 0.5, 0.5]
 
+    array = np.array([None, 1.0, None, 0.5], dtype=np.float64)
+    assert fill_missing(array) is array
+    assert array.tolist() == [1.0, 1.0, 1.0, 0.5]
+
 
 def test_single_series():
     series = [
@@ -43,6 +71,39 @@ def test_single_series():
     assert indexes == [10]
 
 
+def test_single_series_edpelt():
+    series = [
+        1.02,
+        0.95,
+        0.99,
+        1.00,
+        1.12,
+        1.00,
+        1.01,
+        0.98,
+        1.01,
+        0.96,
+        0.50,
+        0.51,
+        0.48,
+        0.48,
+        0.55,
+        0.50,
+        0.49,
+        0.51,
+        0.50,
+        0.49,
+    ]
+    assert edpelt(series) == [10]
+    indexes = [c.index for c in compute_change_points_edpelt(series, max_pvalue=0.0001)]
+    assert indexes == [10]
+
+
+def test_edpelt_multiple_change_points():
+    series = [1.0] * 30 + [2.0] * 30 + [1.5] * 30
+    assert edpelt(series) == [30, 60]
+
+
 def test_significance_tester():
     tester = TTestSignificanceTester(0.001)
 
@@ -55,3 +116,164 @@ def test_significance_tester():
     cp = tester.change_point(5, series, [0, len(series)])
     assert tester.is_significant(EDivisiveChangePoint(5), series, [0, len(series)])
     assert 0.00 < cp.stats.pvalue < 0.001
+
+
+def test_comparative_stats_of_plain_floats():
+    assert ComparativeStats(1.0, 1.5, 0.1, 0.1, 0.5).change_magnitude() == 0.5
+    assert ComparativeStats(0.0, 1.0, 0.1, 0.1, 0.5).change_magnitude() == math.inf
+
+
+def test_mean_and_std():
+    values = np.array([1.00, 1.02, 1.05, 0.95, 0.98, 0.80, 0.82, 0.85, 0.79, 0.77])
+    mean, std = mean_and_std(values)
+    assert mean == np.mean(values)
+    assert abs(std - np.std(values)) < 1e-12
+    assert mean_and_std([2.0]) == (2.0, 0.0)
+
+
+def test_prefix_sums():
+    series = np.array([1.00, 1.02, 1.05, 0.95, 0.98, 0.80, 0.82, 0.85, 0.79, 0.77])
+    sums = PrefixSums(series)
+    for (start, end) in [(0, 10), (0, 5), (5, 10), (3, 4)]:
+        mean, std = sums.mean_and_std(start, end)
+        assert abs(mean - np.mean(series[start:end])) < 1e-12
+        assert abs(std - np.std(series[start:end])) < 1e-12
+
+    tester = TTestSignificanceTester(0.001)
+    expected = tester.change_point(5, series, [0, len(series)])
+    actual = tester.change_point_from_sums(5, sums, [0, len(series)])
+    assert abs(expected.stats.pvalue - actual.stats.pvalue) < 1e-12
+
+
+def test_prefix_sums_large_level_offset():
+    rng = np.random.default_rng(1)
+    series = np.concatenate((1e9 + rng.normal(0, 100, 5000), 2e9 + rng.normal(0, 100, 5000)))
+    sums = PrefixSums(series)
+    mean, std = sums.mean_and_std(9900, 9950)
+    assert abs(std - np.std(series[9900:9950])) < 1e-6
+    means, stds = sums.segments_means_and_stds(np.array([0, 5000, 9900, 9950]))
+    for (k, (start, end)) in enumerate([(0, 5000), (5000, 9900), (9900, 9950)]):
+        assert abs(means[k] - np.mean(series[start:end])) < 1e-6
+        assert abs(stds[k] - np.std(series[start:end])) < 1e-6
+
+    # A constant tail after a large level must have no deviation at all
+    series = np.concatenate((rng.normal(0, 1, 1000), np.full(50, 1e6)))
+    assert PrefixSums(series).mean_and_std(1000, 1050)[1] == 0.0
+
+
+def test_numpy_calculator():
+    series = np.array([1.02, 0.95, 0.99, 1.00, 1.12, 0.90, 0.50, 0.51, 0.48, 0.48, 0.55])
+    actual = NumpyCalculator.calculate_qhat_values(NumpyCalculator.calculate_diffs(series))
+    for calculator in [cext_calculator, numpy_calculator]:
+        expected = calculator.calculate_qhat_values(calculator.calculate_diffs(series))
+        assert np.allclose(expected, actual)
+
+
+def test_numba_calculator():
+    # Without Numba installed, this runs the kernels as plain Python
+    series = np.array([1.02, 0.95, 0.99, 1.00, 1.12, 0.90, 0.50, 0.51, 0.48, 0.48, 0.55])
+    calculator = numba_calculator.NumbaCalculator
+    expected = cext_calculator.calculate_qhat_values(cext_calculator.calculate_diffs(series))
+    actual = calculator.calculate_qhat_values(calculator.calculate_diffs(series))
+    assert np.allclose(expected, actual)
+
+
+def test_load_calculator():
+    assert load_calculator("numpy") is NumpyCalculator
+    assert load_calculator("cext") is cext_calculator
+    assert load_calculator("unknown") is cext_calculator
+    if not numba_calculator.NUMBA_AVAILABLE:
+        assert load_calculator("numba") is cext_calculator
+
+
+def test_find_window():
+    endpoints = [0, 5, 10, 20]
+    assert ExtendedSignificanceTester.find_window(5, endpoints) == (0, 10)
+    assert ExtendedSignificanceTester.find_window(7, endpoints) == (5, 10)
+    assert ExtendedSignificanceTester.find_window(0, endpoints) == (None, 5)
+    assert ExtendedSignificanceTester.find_window(20, endpoints) == (10, None)
+
+
+def test_change_points_from_sums():
+    series = np.array([1.00, 1.02, 1.05, 0.95, 0.98, 0.80, 0.82, 0.85, 0.79, 0.77, 1.2, 1.3])
+    indexes = [1, 5, 10, 11]
+    window_endpoints = [0] + indexes + [len(series)]
+    tester = TTestSignificanceTester(0.001)
+    actual = tester.change_points_from_sums(indexes, PrefixSums(series))
+    assert [cp.index for cp in actual] == indexes
+    for cp in actual:
+        expected = tester.change_point(cp.index, series, window_endpoints)
+        assert abs(expected.stats.mean_1 - cp.stats.mean_1) < 1e-12
+        assert abs(expected.stats.std_2 - cp.stats.std_2) < 1e-12
+        assert abs(expected.stats.pvalue - cp.stats.pvalue) < 1e-12
+    assert tester.change_points_from_sums([], PrefixSums(series)) == []
+
+
+def test_compute_change_points_with_stride():
+    rng = np.random.default_rng(0)
+    series = np.concatenate([rng.normal(mean, 0.01, 400) for mean in [1.0, 1.5, 0.8]])
+    indexes = [c.index for c in compute_change_points(series, max_pvalue=0.0001, stride=4)]
+    assert indexes == [400, 800]
+
+    for stride in [0, 50]:
+        with pytest.raises(ValueError):
+            compute_change_points(series, window_len=50, stride=stride)
+
+
+def test_ttest_pvalue():
+    for stats in [
+        (1.0, 0.1, 20, 1.1, 0.1, 25),
+        (1.0, 0.05, 3, 0.9, 0.2, 40),
+        (5.0, 1.0, 2, 5.5, 2.0, 1),
+    ]:
+        (_, expected) = ttest_ind_from_stats(*stats)
+        assert abs(ttest_pvalue(*stats) - expected) < 1e-12
+
+
+def test_compute_change_points_with_adaptive_step():
+    rng = np.random.default_rng(1)
+    series = np.concatenate([rng.normal(mean, 0.01, 500) for mean in [1.0, 1.5, 0.8]])
+    expected = [c.index for c in compute_change_points(series, max_pvalue=0.0001)]
+    actual = [c.index for c in compute_change_points(series, max_pvalue=0.0001, adaptive_step=True)]
+    assert actual == expected == [500, 1000]
+
+
+def test_compute_change_points_orig():
+    rng = np.random.default_rng(0)
+    series = np.concatenate([rng.normal(mean, 0.02, 100) for mean in [1.0, 1.3, 0.9]])
+    assert [c.index for c in compute_change_points_orig(series)] == [100, 200]
+
+
+def test_permutations_significance_tester_stops_early():
+    rng = np.random.default_rng(0)
+    series = rng.normal(1.0, 0.02, 100)
+    tester = PermutationsSignificanceTester(cext_calculator, pvalue=0.05, permutations=100, seed=1)
+    candidate = EDivisiveChangePoint(index=50, qhat=0.0)
+    assert not tester.is_significant(candidate, series, [0, len(series)])
+    # every permutation reaches zero q-hat, so the test stops after floor(0.05 * 101) + 1
+    assert candidate.probability == 6 / 101
+
+
+def test_permutations_significance_tester_enumerates_tiny_series():
+    series = np.array([1.0, 1.0, 2.0, 2.0])
+    tester = PermutationsSignificanceTester(cext_calculator, pvalue=0.4, permutations=100)
+    qhat = np.max(cext_calculator.calculate_qhat_values(cext_calculator.calculate_diffs(series)))
+    candidate = EDivisiveChangePoint(index=2, qhat=qhat)
+    # 8 of 24 orderings put both 1.0 values before both 2.0 values, or the other way round
+    assert tester.is_significant(candidate, series, [0, len(series)])
+    assert candidate.probability == 8 / 24
+
+
+def test_permutations_significance_tester_counts_orderings_up_to_the_limit():
+    tester = PermutationsSignificanceTester(cext_calculator, pvalue=0.05, permutations=100)
+    count_orderings = tester._PermutationsSignificanceTester__count_orderings
+    assert count_orderings([np.zeros(3), np.zeros(2)]) == 12
+    # Stops at the first partial product over the limit instead of computing 100000!
+    assert count_orderings([np.zeros(100_000)]) == 120
+
+
+def test_compute_change_points_skips_constant_windows():
+    assert compute_change_points([1.0] * 200) == []
+    series = [1.0] * 100 + [2.0] * 100
+    assert [c.index for c in compute_change_points(series)] == [100]
+    assert [c.index for c in compute_change_points(series, adaptive_step=True)] == [100]
@@ -1,6 +1,11 @@
+import os
+import shutil
 from pathlib import Path
 
-from hunter.config import load_config_from
+import pytest
+
+from hunter import config as config_module
+from hunter.config import ConfigError, expand_env_vars, load_config_from
 from hunter.test_config import CsvTestConfig, GraphiteTestConfig, HistoStatTestConfig
 
 
@@ -57,3 +62,168 @@ def test_load_histostat_config():
     assert isinstance(test, HistoStatTestConfig)
     # 14 tags * 12 tag_metrics == 168 unique metrics
     assert len(test.fully_qualified_metric_names()) == 168
+
+
+def test_load_config_reuses_parsed_config_until_modified(tmp_path):
+    config_file = tmp_path / "hunter.yaml"
+    shutil.copy("tests/resources/sample_config.yaml", config_file)
+    config = load_config_from(config_file)
+    assert load_config_from(config_file) is config
+
+    stat = config_file.stat()
+    os.utime(config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert load_config_from(config_file) is not config
+
+
+def test_load_config_creates_tests_on_access(tmp_path):
+    config_file = tmp_path / "hunter.yaml"
+    config_file.write_text(
+        """
+tests:
+  local:
+    type: csv
+    file: tests/resources/sample.csv
+    metrics: [metric1]
+  broken:
+    inherit: [missing_template]
+test_groups:
+  group: [local]
+  broken_group: [local, broken]
+"""
+    )
+    config = load_config_from(config_file)
+    assert sorted(config.tests) == ["broken", "local"]
+    assert [t.name for t in config.test_groups["group"]] == ["local"]
+    assert config.test_groups["group"][0] is config.tests["local"]
+    with pytest.raises(ConfigError):
+        config.tests["broken"]
+    with pytest.raises(ConfigError):
+        config.test_groups["broken_group"]
+
+
+def test_load_config_expands_environment_variables(tmp_path, monkeypatch):
+    monkeypatch.setenv("HUNTER_TEST_CACHE_DIR", str(tmp_path / "cache"))
+    config_file = tmp_path / "hunter.yaml"
+    config_file.write_text("cache_dir: ${HUNTER_TEST_CACHE_DIR}\n")
+    assert load_config_from(config_file).cache_dir == tmp_path / "cache"
+
+    # The same file loaded again in a changed environment
+    monkeypatch.setenv("HUNTER_TEST_CACHE_DIR", str(tmp_path / "other"))
+    assert load_config_from(config_file).cache_dir == tmp_path / "other"
+
+
+def test_load_service_configs(tmp_path):
+    config_file = tmp_path / "hunter.yaml"
+    config_file.write_text("slack:\n  token: xoxb-1\n")
+    config = load_config_from(config_file)
+    assert config.slack.bot_token == "xoxb-1"
+    assert config.postgres is None
+
+    config_file = tmp_path / "invalid.yaml"
+    config_file.write_text("postgres:\n  hostname: localhost\n  port: ''\n")
+    with pytest.raises(ConfigError, match="postgres.port"):
+        load_config_from(config_file)
+
+
+def test_load_json_config(tmp_path):
+    config_file = tmp_path / "hunter.json"
+    config_file.write_text('{"slack": {"token": "xoxb-1"}, "tests": {}}')
+    config = load_config_from(config_file)
+    assert config.slack.bot_token == "xoxb-1"
+    assert len(config.tests) == 0
+
+
+def test_expand_env_vars(monkeypatch):
+    monkeypatch.setenv("HUNTER_TEST_VAR", "value")
+    monkeypatch.delenv("HUNTER_TEST_UNSET", raising=False)
+    assert expand_env_vars("a: $HUNTER_TEST_VAR/${HUNTER_TEST_VAR}") == "a: value/value"
+    assert expand_env_vars("a: ${HUNTER_TEST_UNSET:-default}") == "a: default"
+    assert expand_env_vars("a: \\$HUNTER_TEST_VAR") == "a: $HUNTER_TEST_VAR"
+    with pytest.raises(KeyError):
+        expand_env_vars("a: ${HUNTER_TEST_UNSET}")
+
+
+def test_load_config_reuses_parsed_document_across_processes(tmp_path, monkeypatch):
+    config_file = tmp_path / "hunter.yaml"
+    shutil.copy("tests/resources/sample_config.yaml", config_file)
+    cache_dir = tmp_path / "cache"
+    config = load_config_from(config_file, cache_dir)
+    assert len(list(cache_dir.glob("*.pkl"))) == 1
+
+    # Simulate another process: nothing in memory and the document is not parsed again
+    monkeypatch.setattr(config_module, "CONFIG_CACHE", {})
+    monkeypatch.setattr(config_module.yaml, "load", None)
+    assert load_config_from(config_file, cache_dir) == config
+
+
+def test_load_config_parses_yaml_1_2_scalars(tmp_path):
+    config_file = tmp_path / "hunter.yaml"
+    config_file.write_text(
+        "templates:\n"
+        "  t:\n"
+        "    attrs: [yes, no, on, off, 1:30, 010, 0o10, 0x1F, 1e3, 1_000, true, False, .5]\n"
+    )
+    document = config_module.read_config_document(config_file, (0, 0, 0), None)
+    assert document["templates"]["t"]["attrs"] == [
+        "yes",
+        "no",
+        "on",
+        "off",
+        "1:30",
+        10,
+        8,
+        31,
+        1000.0,
+        1000,
+        True,
+        False,
+        0.5,
+    ]
+
+
+def test_load_config_reports_malformed_files(tmp_path):
+    for (name, content) in [("hunter.json", '{"tests": {'), ("hunter.yaml", "tests: [a")]:
+        config_file = tmp_path / name
+        config_file.write_text(content)
+        with pytest.raises(ConfigError) as e:
+            load_config_from(config_file)
+        assert e.value.message.startswith(f"Failed to parse {config_file}: ")
+
+
+def test_load_config_notices_file_replaced_with_same_mtime(tmp_path, monkeypatch):
+    config_file = tmp_path / "hunter.yaml"
+    config_file.write_text("cache_dir: /tmp/a\n")
+    stat = config_file.stat()
+    cache_dir = tmp_path / "cache"
+    assert load_config_from(config_file, cache_dir).cache_dir == Path("/tmp/a")
+
+    # Like `cp -p`: different content, same modification time
+    config_file.write_text("cache_dir: /tmp/longer\n")
+    os.utime(config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert load_config_from(config_file, cache_dir).cache_dir == Path("/tmp/longer")
+    monkeypatch.setattr(config_module, "CONFIG_CACHE", {})
+    assert load_config_from(config_file, cache_dir).cache_dir == Path("/tmp/longer")
+
+
+def test_load_config_stores_documents_only_when_asked(tmp_path, monkeypatch):
+    config_file = tmp_path / "hunter.yaml"
+    shutil.copy("tests/resources/sample_config.yaml", config_file)
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("HUNTER_CONFIG", str(config_file))
+    monkeypatch.delenv("HUNTER_CONFIG_CACHE_DIR", raising=False)
+    config_module.load_config()
+    assert not list(tmp_path.rglob("*.pkl"))
+
+    monkeypatch.setattr(config_module, "CONFIG_CACHE", {})
+    monkeypatch.setenv("HUNTER_CONFIG_CACHE_DIR", str(tmp_path / "cache"))
+    config_module.load_config()
+    assert len(list((tmp_path / "cache").glob("*.pkl"))) == 1
+
+
+def test_load_config_does_not_store_documents_with_env_vars(tmp_path, monkeypatch):
+    monkeypatch.setenv("HUNTER_TEST_CACHE_DIR", str(tmp_path / "data"))
+    config_file = tmp_path / "hunter.yaml"
+    config_file.write_text("cache_dir: ${HUNTER_TEST_CACHE_DIR}\n")
+    cache_dir = tmp_path / "cache"
+    load_config_from(config_file, cache_dir)
+    assert not cache_dir.exists()
@@ -1,4 +1,14 @@
-from hunter.graphite import compress_target_paths
+from requests.utils import requote_uri
+
+from hunter.data_selector import DataSelector
+from hunter.graphite import (
+    Graphite,
+    GraphiteConfig,
+    compress_target_paths,
+    decode_event_data,
+    decode_graphite_datapoints,
+    parse_graphite_time,
+)
 
 
 def test_compress_target_paths():
@@ -17,3 +27,47 @@ def test_compress_target_paths():
         "foo.foo.baz.{p50,p75,throughput}",
         "something.else",
     }
+
+
+def test_decode_graphite_datapoints():
+    series = {"target": "foo", "datapoints": [[1.5, 100], [None, 110], [2.0, 120.0]]}
+    (times, values) = decode_graphite_datapoints(series)
+    assert times.tolist() == [100, 120]
+    assert values.tolist() == [1.5, 2.0]
+
+    (times, values) = decode_graphite_datapoints({"target": "foo", "datapoints": []})
+    assert len(times) == len(values) == 0
+
+
+def test_decode_event_data():
+    assert decode_event_data('{"version": "1.0", "commit": null}') == {
+        "version": "1.0",
+        "commit": None,
+    }
+    assert decode_event_data("{'version': '1.0', 'commit': None}") == {
+        "version": "1.0",
+        "commit": None,
+    }
+
+
+def test_parse_graphite_time():
+    assert parse_graphite_time(1617000000).timestamp() == 1617000000
+    assert parse_graphite_time("1617000000.5").timestamp() == 1617000000.5
+    assert parse_graphite_time("2021-03-29T06:40:00Z").timestamp() == 1617000000
+
+
+def test_fetch_data_keeps_quoted_urls_within_limit(monkeypatch):
+    graphite = Graphite(GraphiteConfig(url="http://graphite/"))
+    urls = []
+
+    def get(url: str) -> bytes:
+        urls.append(url)
+        return b"[]"
+
+    monkeypatch.setattr(graphite, "_Graphite__url_limit", 300)
+    monkeypatch.setattr(graphite, "_Graphite__get", get)
+    paths = [f"test.metric{i}.p{p}" for i in range(50) for p in (50, 75, 99)]
+    graphite.fetch_data(paths, DataSelector())
+
+    assert len(urls) > 1
+    assert all(len(requote_uri(url)) <= 300 for url in urls)
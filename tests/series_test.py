@@ -1,7 +1,13 @@
+import os
 import time
 from random import random
 
-from hunter.series import AnalysisOptions, Metric, Series, compare
+import numpy as np
+import pytest
+
+from hunter import series
+from hunter.cache import MAX_ENTRY_AGE, ChangePointCache
+from hunter.series import AnalysisOptions, Metric, Series, compare, detect_change_points
 
 
 def test_change_point_detection():
@@ -52,6 +58,109 @@ def test_change_point_min_magnitude():
             ), f"All change points must have magnitude greater than {options.min_magnitude}"
 
 
+def test_change_point_detection_in_parallel(monkeypatch):
+    series_1 = [1.02, 0.95, 0.99, 1.00, 1.12, 0.90, 0.50, 0.51, 0.48, 0.48, 0.55]
+    series_2 = [2.02, 2.03, 2.01, 2.04, 1.82, 1.85, 1.79, 1.81, 1.80, 1.76, 1.78]
+    time = list(range(len(series_1)))
+    test = Series(
+        "test",
+        branch=None,
+        time=time,
+        metrics={"series1": Metric(1, 1.0), "series2": Metric(1, 1.0)},
+        data={"series1": series_1, "series2": series_2},
+        attributes={},
+    )
+
+    sequential = test.analyze().change_points
+    monkeypatch.setattr(os, "cpu_count", lambda: 2)
+    options = AnalysisOptions()
+    options.parallel_min_points = 0
+    parallel = test.analyze(options).change_points
+    assert parallel == sequential
+
+
+def test_small_series_analyzed_without_worker_processes(monkeypatch):
+    def no_pool(*args, **kwargs):
+        raise AssertionError("Worker processes must not be started for small series")
+
+    monkeypatch.setattr(os, "cpu_count", lambda: 4)
+    monkeypatch.setattr(series, "ProcessPoolExecutor", no_pool)
+    data = {f"metric{i}": [random() for _ in range(200)] for i in range(10)}
+    test = Series(
+        "test",
+        branch=None,
+        time=list(range(200)),
+        metrics={metric: Metric(1, 1.0) for metric in data},
+        data=data,
+        attributes={},
+    )
+    assert len(test.analyze().change_points) == 10
+
+
+def test_change_point_cache(tmp_path):
+    series_1 = [1.02, 0.95, 0.99, 1.00, 1.12, 0.90, 0.50, 0.51, 0.48, 0.48, 0.55]
+    time = list(range(len(series_1)))
+    test = Series(
+        "test",
+        branch=None,
+        time=time,
+        metrics={"series1": Metric(1, 1.0)},
+        data={"series1": series_1},
+        attributes={},
+    )
+
+    options = AnalysisOptions()
+    options.cache_dir = tmp_path
+    change_points = test.analyze(options).change_points["series1"]
+    assert len(list(tmp_path.glob("*.pkl"))) == 1
+    cached_change_points = test.analyze(options).change_points["series1"]
+    assert [c.index for c in cached_change_points] == [c.index for c in change_points] == [6]
+    assert cached_change_points[0].stats == change_points[0].stats
+
+    options.min_magnitude = 0.5
+    test.analyze(options)
+    assert len(list(tmp_path.glob("*.pkl"))) == 2
+
+
+def test_change_point_detection_rejects_two_algorithms():
+    options = AnalysisOptions()
+    options.orig_edivisive = True
+    options.edpelt = True
+    with pytest.raises(ValueError):
+        detect_change_points(np.array([1.0, 2.0, 1.0]), options)
+
+
+def test_change_point_detection_with_stride():
+    series_1 = [1.0 + 0.01 * (i % 3) for i in range(200)] + [
+        1.5 + 0.01 * (i % 3) for i in range(200)
+    ]
+    test = Series(
+        "test",
+        branch=None,
+        time=list(range(len(series_1))),
+        metrics={"series1": Metric(1, 1.0)},
+        data={"series1": series_1},
+        attributes={},
+    )
+    options = AnalysisOptions()
+    options.stride = 4
+    assert [c.index for c in test.analyze(options).change_points["series1"]] == [200]
+
+
+def test_change_point_cache_eviction(tmp_path):
+    cache = ChangePointCache(tmp_path)
+    cache.put("old", [])
+    cache.put("used", [])
+    long_ago = time.time() - MAX_ENTRY_AGE - 60
+    for key in ("old", "used"):
+        os.utime(tmp_path / f"{key}.pkl", (long_ago, long_ago))
+    os.utime(tmp_path / ".last-eviction", (long_ago, long_ago))
+
+    assert cache.get("used") == []
+    cache.put("new", [])
+    assert sorted(p.stem for p in tmp_path.glob("*.pkl")) == ["new", "used"]
+
+
 def test_change_point_detection_performance():
     timestamps = range(0, 90)  # 3 months of data
     series = [random() for x in timestamps]
@@ -151,3 +260,25 @@ def test_compare_metrics_order():
     ).analyze()
     cmp = compare(test, None, test, None)
     assert list(cmp.stats.keys()) == ["m1", "m2", "m3", "m4", "m5"]
+
+
+def test_attributes():
+    series_1 = [1.02, 0.95, 0.99, 1.00, 1.12, 0.90, 0.50, 0.51, 0.48, 0.48, 0.55]
+    commits = [f"c{i}" for i in range(len(series_1))]
+    test = Series(
+        "test",
+        branch=None,
+        time=list(range(len(series_1))),
+        metrics={"series1": Metric(1, 1.0)},
+        data={"series1": series_1},
+        attributes={"commit": commits},
+    )
+
+    assert test.attributes_at(3) == {"commit": "c3"}
+    assert test.find_by_attribute("commit", "c5") == [5]
+    assert test.find_by_attribute("commit", "none") == []
+    assert test.find_by_attribute("version", "1.0") == []
+
+    change_points = test.analyze().change_points_by_time
+    assert change_points[0].attributes == {"commit": "c6"}
+    assert change_points[0].prev_attributes == {"commit": "c5"}
@@ -1,11 +1,19 @@
+import pickle
+
+import pytest
+
 from hunter.util import (
+    MAX_CONCURRENT_REQUESTS,
+    create_session,
     insert_multiple,
     interpolate,
     merge_dict_list,
     merge_dicts,
     merge_sorted,
     remove_common_prefix,
+    resolution,
     sliding_window,
+    write_pickle_atomically,
 )
 
 
@@ -78,3 +86,30 @@ def test_interpolate():
         "name1:foo, name2:null",
         "name1:bar, name2:null",
     ]
+
+
+def test_resolution():
+    assert resolution([]) == 24 * 3600
+    assert resolution([3600]) == 24 * 3600
+    assert resolution([0, 3600, 3600, 7200]) == 3600
+    assert resolution([0, 60, 3600]) == 60
+    assert resolution([90, 180]) == 90
+
+
+def test_write_pickle_atomically(tmp_path):
+    path = tmp_path / "dir" / "file.pkl"
+    write_pickle_atomically(path, {"a": 1})
+    assert pickle.loads(path.read_bytes()) == {"a": 1}
+
+    with pytest.raises(TypeError):
+        write_pickle_atomically(path, (x for x in range(3)))
+    assert pickle.loads(path.read_bytes()) == {"a": 1}
+    assert list(path.parent.iterdir()) == [path]
+
+
+def test_create_session():
+    session = create_session(retries=3)
+    for prefix in ("http://", "https://"):
+        adapter = session.get_adapter(f"{prefix}example.com")
+        assert adapter.max_retries.total == 3
+        assert adapter._pool_maxsize == MAX_CONCURRENT_REQUESTS